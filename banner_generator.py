@@ -4,28 +4,95 @@ Ultimate PyPI Banner Generator
 Professional banner creation with multiple styles and batch generation
 """
 
+import io
 import os
+import re
+import base64
 import sys
+import json
+import hashlib
+import contextlib
 import argparse
 import requests
 from datetime import datetime
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageChops, ImageColor, ImageDraw, ImageFont
 import math
 import time
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+try:
+    from fontTools import subset as font_subset
+except ImportError:  # Optional: SVG banners then embed whole fonts
+    font_subset = None
 
 # Configuration
-LOGO_PATH = "pypi_logo.png"
+# Bundled assets live next to this file, so the generator works from any cwd
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGO_PATH = os.path.join(ASSET_DIR, "pypi_logo.png")
 OUTPUT_DIR = "output"
-FONT_BOLD = "DejaVuSans-Bold.ttf"
-FONT_REGULAR = "DejaVuSans.ttf"
+FONT_BOLD = os.path.join(ASSET_DIR, "DejaVuSans-Bold.ttf")
+FONT_REGULAR = os.path.join(ASSET_DIR, "DejaVuSans.ttf")
+# Font faces and the (face, size) used for each text role on the banner
+FONT_FACES = {'bold': FONT_BOLD, 'regular': FONT_REGULAR}
+FONT_ROLES = {
+    'title': ('bold', 48),
+    'version': ('bold', 20),
+    'desc': ('regular', 22),
+    'badge': ('regular', 16),
+    'cmd': ('bold', 28),
+    'url': ('regular', 18),
+}
+
+PYPI_BASE_URL = os.environ.get("PYPI_BASE_URL", "https://pypi.org")
+CACHE_DIR = os.environ.get("PYPI_BANNER_CACHE_DIR") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "pypi-banner-generator")
+METADATA_CACHE_TTL = 3600  # seconds
+RENDER_INDEX_NAME = ".render-cache.json"
+
+# Bump whenever a change to the renderer alters the pixels it produces,
+# so content-addressed renders from older versions are not reused
+RENDERER_VERSION = 6
+
+# Longest summary shown before it is cut off with an ellipsis
+SUMMARY_MAX_LINES = 4
+
+# Auto-fit ladder, from the preferred layout down to the most compact one:
+# (title size, summary size, command size, summary lines). Every step is at
+# least as small as the previous one, so the fit check is monotonic.
+FIT_LADDER = [
+    (48, 22, 28, SUMMARY_MAX_LINES),
+    (48, 22, 28, 3),
+    (44, 22, 28, 3),
+    (44, 20, 26, 3),
+    (40, 20, 26, 3),
+    (40, 20, 24, 2),
+    (36, 18, 24, 2),
+    (32, 18, 22, 2),
+    (28, 16, 20, 1),
+]
 
-# Fixed banner dimensions
+# Default banner dimensions (layouts are planned in these units and
+# rasterized at any scale; see Canvas)
 IMG_WIDTH = 1200
 IMG_HEIGHT = 630
 PADDING = 80
 
-# Enhanced theme collection with consistent color schemes
-ALL_THEMES = {
+# Enhanced theme collection with consistent color schemes (compiled into
+# ALL_THEMES, see ThemeRegistry)
+BUILTIN_THEMES = {
     '1': {
         'name': 'professional_light',
         'description': 'Clean white background - Corporate style',
@@ -163,254 +230,2531 @@ ALL_THEMES = {
     }
 }
 
-class UltimateBannerGenerator:
-    def __init__(self):
-        self.fonts = self._load_fonts()
-        
-    def _load_fonts(self):
-        """Load fonts with fallback"""
-        fonts = {}
-        sizes = {
-            'title': 48,
-            'version': 20,
-            'desc': 22,
-            'badge': 16,
-            'cmd': 28,
-            'url': 18
-        }
+def _hex_to_rgb(color):
+    """Convert a colour string such as '#rrggbb' (or an RGB tuple) to an RGB tuple"""
+    if isinstance(color, (tuple, list)):
+        return tuple(color[:3])
+    if re.fullmatch(r'[0-9a-fA-F]{6}', color):
+        color = '#' + color
+    return ImageColor.getrgb(color)[:3]
+
+def _normalize_stops(stops):
+    """Turn colours or (position, colour) pairs into sorted (position, rgb) stops"""
+    stops = list(stops)
+    if len(stops) < 2:
+        raise ValueError("A gradient needs at least two colour stops")
+    
+    normalized = []
+    for i, stop in enumerate(stops):
+        if isinstance(stop, (tuple, list)) and len(stop) == 2:
+            position, color = stop
+        else:
+            position, color = i / (len(stops) - 1), stop
+        normalized.append((min(max(float(position), 0.0), 1.0), _hex_to_rgb(color)))
+    
+    normalized.sort(key=lambda s: s[0])
+    return normalized
+
+def _gradient_ramp(stops, length, end=None):
+    """Sample the colour stops into a packed RGB byte ramp
+    
+    Sample ``i`` sits at ``i / end`` along the gradient (``end`` defaults to
+    ``length``, which matches the classic row-by-row renderer).
+    """
+    end = length if end is None else end
+    ramp = bytearray()
+    segment = 0
+    
+    for i in range(length):
+        t = i / end if end else 0.0
+        while segment < len(stops) - 2 and t > stops[segment + 1][0]:
+            segment += 1
+        (p0, c0), (p1, c1) = stops[segment], stops[segment + 1]
+        ratio = (t - p0) / (p1 - p0) if p1 > p0 else 0.0
+        ratio = min(max(ratio, 0.0), 1.0)
+        ramp.extend(int(c0[k] * (1 - ratio) + c1[k] * ratio) for k in range(3))
+    
+    return bytes(ramp)
+
+def create_gradient(width, height, stops, angle=90):
+    """Render a linear gradient in a single bulk operation
+    
+    ``stops`` is a list of colours (spread evenly) or ``(position, colour)``
+    pairs with positions in 0..1. ``angle`` is measured clockwise from the
+    x axis: 90 runs top to bottom, 0 runs left to right.
+    """
+    stops = _normalize_stops(stops)
+    angle = angle % 360
+    
+    # Axis-aligned gradients: build one exact row/column and stretch it
+    if angle in (90, 270):
+        strip = Image.frombytes('RGB', (1, height), _gradient_ramp(stops, height))
+        img = strip.resize((width, height), Image.NEAREST)
+        return img.transpose(Image.FLIP_TOP_BOTTOM) if angle == 270 else img
+    if angle in (0, 180):
+        strip = Image.frombytes('RGB', (width, 1), _gradient_ramp(stops, width))
+        img = strip.resize((width, height), Image.NEAREST)
+        return img.transpose(Image.FLIP_LEFT_RIGHT) if angle == 180 else img
+    
+    # Angled gradients: rotate a greyscale ramp and map it through per-channel LUTs
+    radians = math.radians(angle)
+    span = max(1, int(math.ceil(abs(width * math.cos(radians)) + abs(height * math.sin(radians)))))
+    diagonal = int(math.ceil(math.hypot(width, height))) + 2
+    
+    ramp = Image.new('L', (diagonal, diagonal), 0)
+    ramp.paste(255, (0, (diagonal + span) // 2, diagonal, diagonal))
+    ramp.paste(Image.linear_gradient('L').resize((diagonal, span), Image.BILINEAR),
+               (0, (diagonal - span) // 2))
+    ramp = ramp.rotate(90 - angle, resample=Image.BILINEAR, fillcolor=0)
+    
+    left = (diagonal - width) // 2
+    top = (diagonal - height) // 2
+    ramp = ramp.crop((left, top, left + width, top + height))
+    
+    lut = _gradient_ramp(stops, 256, end=255)
+    channels = [ramp.point(list(lut[k::3])) for k in range(3)]
+    return Image.merge('RGB', channels)
+
+class ThemeError(ValueError):
+    """Raised when a theme definition is incomplete or invalid"""
+
+# Theme categories, in menu order: key -> (label, description)
+THEME_CATEGORIES = {
+    'professional': ('Professional', 'Corporate and business styles'),
+    'minimal': ('Minimal', 'Clean and simple designs'),
+    'gradient': ('Gradient', 'Colorful gradient backgrounds'),
+    'modern': ('Modern', 'Trendy and experimental styles'),
+}
+
+# Colours every theme defines, plus the background keys and default
+# category of each theme type
+THEME_COLORS = ('primary', 'secondary', 'accent', 'card', 'border')
+THEME_TYPES = {
+    'professional': (('bg',), 'professional'),
+    'minimal': (('bg',), 'minimal'),
+    'material': (('bg',), 'modern'),
+    'glassmorphism': (('bg',), 'modern'),
+    'neon': (('bg',), 'modern'),
+    'gradient': ((), 'gradient'),
+    'synthwave': ((), 'gradient'),
+}
+GRADIENT_THEME_TYPES = ('gradient', 'synthwave')
+THEME_ENTRY_POINT_GROUP = 'pypi_banner_generator.themes'
+
+class Theme(dict):
+    """A validated theme with its colours parsed once
+    
+    Still a dict of the original definition, so it prints, pickles and
+    hashes into render keys exactly like an ``ALL_THEMES`` entry did. The
+    parsed colours are in ``rgb`` (one RGB tuple per colour key) and
+    gradient themes have their normalized colour stops in ``stops``.
+    ``signature`` is the definition as canonical JSON, for cache keys.
+    """
+    
+    __slots__ = ('key', 'category', 'rgb', 'stops', 'signature')
+    
+    def __init__(self, key, spec):
+        super().__init__(spec)
+        self.key = key
         
-        for name, size in sizes.items():
-            try:
-                font_file = FONT_BOLD if name in ['title', 'version', 'cmd'] else FONT_REGULAR
-                fonts[name] = ImageFont.truetype(font_file, size)
-            except:
-                fonts[name] = ImageFont.load_default()
-        
-        return fonts
-    
-    def _create_gradient_background(self, width, height, color_start, color_end):
-        """Create gradient background"""
-        img = Image.new('RGB', (width, height))
-        
-        # Convert hex to RGB
-        start_rgb = tuple(int(color_start[i:i+2], 16) for i in (1, 3, 5))
-        end_rgb = tuple(int(color_end[i:i+2], 16) for i in (1, 3, 5))
-        
-        for y in range(height):
-            ratio = y / height
-            color = tuple(
-                int(start_rgb[i] * (1 - ratio) + end_rgb[i] * ratio)
-                for i in range(3)
-            )
-            draw = ImageDraw.Draw(img)
-            draw.line([(0, y), (width, y)], fill=color)
+        label = f"Theme '{key}'" if key is not None else "Theme"
+        missing = [name for name in ('name', 'type') if not self.get(name)]
+        if missing:
+            raise ThemeError(f"{label} is missing {', '.join(missing)}")
+        if self['type'] not in THEME_TYPES:
+            raise ThemeError(f"{label} has unknown type '{self['type']}' "
+                             f"(expected one of {', '.join(THEME_TYPES)})")
         
-        return img
+        background, category = THEME_TYPES[self['type']]
+        missing = [name for name in THEME_COLORS + background if name not in self]
+        if self['type'] in GRADIENT_THEME_TYPES and not self.get('bg_stops') \
+                and not ('bg_start' in self and 'bg_end' in self):
+            missing.append('bg_stops (or bg_start and bg_end)')
+        if missing:
+            raise ThemeError(f"{label} ({self['type']}) is missing {', '.join(missing)}")
+        self.category = self.get('category', category)
+        if not isinstance(self.category, str):
+            raise ThemeError(f"{label} has an invalid category")
+        self.signature = json.dumps(self, sort_keys=True)
+        
+        try:
+            self.rgb = {name: _hex_to_rgb(value) for name, value in self.items()
+                        if name in THEME_COLORS or name in ('bg', 'bg_start', 'bg_end')}
+            self.stops = None
+            if self['type'] in GRADIENT_THEME_TYPES:
+                self.stops = _normalize_stops(self.get('bg_stops') or [self['bg_start'], self['bg_end']])
+        except (ValueError, TypeError) as e:
+            raise ThemeError(f"{label} has an invalid colour: {e}")
+    
+    def __reduce__(self):
+        return (Theme, (self.key, dict(self)))
+    
+    @property
+    def title(self):
+        """Display name, e.g. 'Professional Light'"""
+        return self['name'].replace('_', ' ').title()
+    
+    @classmethod
+    def coerce(cls, theme):
+        """Return ``theme`` as a Theme, compiling plain dicts"""
+        return theme if isinstance(theme, cls) else cls(None, theme)
+
+class ThemeRegistry:
+    """Compiled themes by key, in menu order
+    
+    Behaves like a read-only dict of Theme objects. Extra themes can be
+    added from TOML or JSON files (``load_file``) or from installed plugins
+    that register a mapping of themes under the
+    ``pypi_banner_generator.themes`` entry point group.
+    """
+    
+    def __init__(self, specs=None):
+        self._themes = {}
+        for key, spec in (specs or {}).items():
+            self.add(key, spec)
+    
+    def add(self, key, spec):
+        """Validate and register one theme, returning it"""
+        key = str(key)
+        if key in self._themes:
+            raise ThemeError(f"Theme '{key}' is already defined")
+        theme = self._themes[key] = Theme(key, spec)
+        return theme
+    
+    def update(self, specs):
+        """Register every theme of a ``{key: spec}`` mapping"""
+        if not isinstance(specs, dict):
+            raise ThemeError("Expected a mapping of theme keys to theme definitions")
+        specs = specs.get('themes', specs)
+        return [self.add(key, spec) for key, spec in specs.items()]
+    
+    def load_file(self, path):
+        """Register the themes in a TOML or JSON file
+        
+        The file holds a ``themes`` table (or object) keyed by theme key,
+        each entry shaped like an ``ALL_THEMES`` entry.
+        """
+        if path.endswith('.toml'):
+            if tomllib is None:
+                raise RuntimeError("Reading TOML theme files needs Python 3.11+ or the 'tomli' package")
+            with open(path, 'rb') as fh:
+                specs = tomllib.load(fh)
+        else:
+            with open(path, 'r', encoding='utf-8') as fh:
+                specs = json.load(fh)
+        return self.update(specs)
+    
+    def load_entry_points(self, group=THEME_ENTRY_POINT_GROUP):
+        """Register themes from installed plugins
+        
+        Each entry point names a ``{key: spec}`` mapping or a callable
+        returning one. Returns ``[(entry point name, error)]`` for the
+        plugins that could not be loaded; the others are still registered.
+        """
+        try:
+            from importlib.metadata import entry_points
+        except ImportError:  # Python < 3.8
+            return []
+        
+        found = entry_points()
+        found = found.select(group=group) if hasattr(found, 'select') else found.get(group, [])
+        errors = []
+        for entry_point in found:
+            try:
+                specs = entry_point.load()
+                self.update(specs() if callable(specs) else specs)
+            except Exception as e:
+                errors.append((entry_point.name, e))
+        return errors
     
-    def _create_glassmorphism_background(self, width, height, theme):
-        """Create glassmorphism effect background"""
-        img = Image.new('RGB', (width, height), theme['bg'])
-        draw = ImageDraw.Draw(img)
+    def categories(self):
+        """Return ``[(label, description, [keys])]`` for non-empty categories"""
+        grouped = {}
+        for key, theme in self._themes.items():
+            grouped.setdefault(theme.category, []).append(key)
+        order = list(THEME_CATEGORIES) + [name for name in grouped if name not in THEME_CATEGORIES]
+        return [(*THEME_CATEGORIES.get(name, (name.replace('_', ' ').title(), 'Custom themes')), grouped[name])
+                for name in order if name in grouped]
+    
+    def describe_keys(self):
+        """Short description of the valid keys for prompts, e.g. '1-12'"""
+        keys = list(self._themes)
+        if all(key.isdigit() for key in keys) and keys == [str(i) for i in range(1, len(keys) + 1)]:
+            return f"1-{len(keys)}"
+        return ', '.join(keys)
+    
+    def __getitem__(self, key):
+        return self._themes[key]
+    
+    def __contains__(self, key):
+        return key in self._themes
+    
+    def __iter__(self):
+        return iter(self._themes)
+    
+    def __len__(self):
+        return len(self._themes)
+    
+    def get(self, key, default=None):
+        return self._themes.get(key, default)
+    
+    def keys(self):
+        return self._themes.keys()
+    
+    def values(self):
+        return self._themes.values()
+    
+    def items(self):
+        return self._themes.items()
+
+ALL_THEMES = ThemeRegistry(BUILTIN_THEMES)
+
+class FontLoadError(Exception):
+    """Raised when a font face cannot be loaded"""
+
+class _FontBytes:
+    """File-like wrapper handing Pillow an already loaded font file"""
+    
+    def __init__(self, data):
+        self._data = data
+    
+    def read(self):
+        return self._data
+
+class FontManager:
+    """Lazily loaded fonts with a (face, size) LRU cache
+    
+    Each font file is read once per process into a single bytes object that
+    every size of that face shares (FreeType reads glyphs straight from it).
+    Preloading before a fork-based worker pool starts lets the workers share
+    those pages with the parent instead of reading the files again.
+    """
+    
+    def __init__(self, faces=None, max_fonts=64):
+        self.faces = dict(FONT_FACES if faces is None else faces)
+        self.max_fonts = max_fonts
+        self._setup()
+    
+    def _setup(self):
+        self._data = {}
+        self._fonts = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __getstate__(self):
+        return {'faces': self.faces, 'max_fonts': self.max_fonts}
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._setup()
+    
+    def _font_data(self, face):
+        """Return the raw bytes of a face, reading the file on first use"""
+        data = self._data.get(face)
+        if data is None:
+            if face not in self.faces:
+                raise FontLoadError(f"Unknown font face '{face}'")
+            path = self.faces[face]
+            try:
+                with open(path, 'rb') as fh:
+                    data = fh.read()
+            except OSError as e:
+                raise FontLoadError(f"Cannot read font '{path}': {e}") from e
+            self._data[face] = data
+        return data
+    
+    def font_data(self, face):
+        """Return the raw bytes of a face's font file"""
+        with self._lock:
+            return self._font_data(face)
+    
+    def preload(self):
+        """Read every face now (e.g. before forking worker processes)"""
+        with self._lock:
+            for face in self.faces:
+                self._font_data(face)
+    
+    def get(self, face, size):
+        """Return the FreeType font for ``face`` at ``size`` pixels"""
+        key = (face, size)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self._fonts.move_to_end(key)
+                return font
+            
+            data = self._font_data(face)
+            try:
+                font = ImageFont.truetype(_FontBytes(data), size)
+            except OSError as e:
+                raise FontLoadError(f"Cannot load font '{self.faces[face]}' at size {size}: {e}") from e
+            
+            self._fonts[key] = font
+            if len(self._fonts) > self.max_fonts:
+                self._fonts.popitem(last=False)
+            return font
+
+class FontRoles:
+    """Read-only mapping from text roles ('title', 'desc', ...) to fonts"""
+    
+    def __init__(self, manager, roles=None):
+        self.manager = manager
+        self.roles = dict(FONT_ROLES if roles is None else roles)
+    
+    def __getitem__(self, role):
+        return self.manager.get(*self.roles[role])
+    
+    def __contains__(self, role):
+        return role in self.roles
+    
+    def __iter__(self):
+        return iter(self.roles)
+    
+    def __len__(self):
+        return len(self.roles)
+
+TextLine = namedtuple('TextLine', ['text', 'width', 'height'])
+
+class TextMeasurer:
+    """Memoized advance widths and heights for one font
+    
+    Word advances are cached, so wrapping a summary measures each distinct
+    word once instead of re-measuring the whole line for every word.
+    """
+    
+    def __init__(self, font, max_entries=8192):
+        self.font = font
+        self.max_entries = max_entries
+        self._lengths = {}
+        self._heights = {}
+    
+    def length(self, text):
+        """Advance width of ``text`` (same value as ImageDraw.textlength)"""
+        value = self._lengths.get(text)
+        if value is None:
+            if len(self._lengths) >= self.max_entries:
+                self._lengths.clear()
+            value = self._lengths[text] = self.font.getlength(text)
+        return value
+    
+    def height(self, text):
+        """Bottom of the ink box of ``text``, as used for line advances"""
+        value = self._heights.get(text)
+        if value is None:
+            if len(self._heights) >= self.max_entries:
+                self._heights.clear()
+            value = self._heights[text] = self.font.getbbox(text)[3]
+        return value
+    
+    def line(self, text):
+        """Measure a finished line"""
+        return TextLine(text, self.length(text), self.height(text))
+
+def truncate_text(text, measurer, max_width, ellipsis="\u2026", force=False):
+    """Cut ``text`` so that it plus ``ellipsis`` fits ``max_width``
+    
+    Text that already fits is returned unchanged unless ``force`` is set.
+    """
+    if not force and measurer.length(text) <= max_width:
+        return text
+    
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if measurer.length(text[:mid].rstrip() + ellipsis) <= max_width:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low].rstrip() + ellipsis
+
+def _break_word(words, index, measurer, max_width):
+    """Hard-break ``words[index]`` in place if it is wider than ``max_width`` on its own
+    
+    Prefixes are measured at doubling lengths, so the cost depends on
+    ``max_width`` rather than on the length of the word.
+    """
+    word = words[index]
+    if len(word) <= 1:
+        return
+    probe = 16
+    while probe < len(word) and measurer.length(word[:probe]) <= max_width:
+        probe *= 2
+    if probe >= len(word) and measurer.length(word) <= max_width:
+        return
+    
+    # Widest prefix that fits (at least one character, so wrapping always advances)
+    low, high = 1, min(probe, len(word)) - 1
+    while low < high:
+        mid = (low + high + 1) // 2
+        if measurer.length(word[:mid]) <= max_width:
+            low = mid
+        else:
+            high = mid - 1
+    if low < len(word):
+        words[index:index + 1] = [word[:low], word[low:]]
+
+def layout_text(text, measurer, max_width, max_lines=None, ellipsis="\u2026"):
+    """Greedy word wrap in a single pass over the words
+    
+    Line widths are estimated from cached word advances and confirmed with
+    one exact measurement per line. Words wider than a whole line are
+    broken across lines. With ``max_lines``, the text is cut at that many
+    lines and the last one ends with ``ellipsis``. Returns a list of
+    TextLine tuples carrying the width and height of each line.
+    """
+    words = text.split()
+    space = measurer.length(" ")
+    lines = []
+    start = 0
+    
+    while start < len(words):
+        if max_lines is not None and len(lines) == max_lines:
+            break
+        
+        # Estimate how many words fit from the cached advances
+        end = start + 1
+        _break_word(words, start, measurer, max_width)
+        width = measurer.length(words[start])
+        while end < len(words):
+            _break_word(words, end, measurer, max_width)
+            width += space + measurer.length(words[end])
+            if width > max_width:
+                break
+            end += 1
         
-        # Add some geometric shapes for depth
+        # Confirm against the real line width (kerning can shift it slightly)
+        while end - start > 1 and measurer.length(" ".join(words[start:end])) > max_width:
+            end -= 1
+        while end < len(words) and measurer.length(" ".join(words[start:end + 1])) <= max_width:
+            end += 1
+        
+        lines.append((start, end))
+        start = end
+    
+    result = [measurer.line(" ".join(words[a:b])) for a, b in lines]
+    
+    if start < len(words) and result:
+        # Truncated: fit as much of the remaining text as possible before the ellipsis
+        # (the last line plus the word that did not fit is all that can matter)
+        a, b = lines[-1]
+        tail = " ".join(words[a:b + 1])
+        result[-1] = measurer.line(truncate_text(tail, measurer, max_width, ellipsis, force=True))
+    
+    return result
+
+# Layout elements. Colours are theme slot names ('primary', 'card', ...),
+# a tuple of fallback slots, or a literal colour such as 'white'.
+LayoutText = namedtuple('LayoutText', ['position', 'mask', 'color'])
+LayoutBox = namedtuple('LayoutBox', ['bbox', 'radius', 'fill', 'outline', 'role'],
+                       defaults=(None, None))
+LayoutImage = namedtuple('LayoutImage', ['position', 'asset'])
+
+# A badge drawn from one cached sprite (see BadgeCache). ``bbox`` is inclusive
+# like LayoutBox's; ``fg``/``bg`` are theme colours and ``font`` is a
+# ``(face, size)`` key into the FontManager, so layouts pickle cheaply
+LayoutBadge = namedtuple('LayoutBadge', ['bbox', 'text', 'font', 'fg', 'bg', 'radius', 'text_offset'])
+
+# Display list operations (see DisplayList), in canvas units. Boxes are
+# inclusive like LayoutBox's, fonts are ``(face, size)`` keys into the
+# FontManager and assets are names ('logo'). Layout ops use theme colours;
+# the ops a theme background expands to (see ``background_ops``) carry
+# concrete RGB or RGBA tuples.
+BackgroundOp = namedtuple('BackgroundOp', [])
+RectOp = namedtuple('RectOp', ['bbox', 'fill'])
+RoundedRectOp = namedtuple('RoundedRectOp', ['bbox', 'radius', 'fill', 'outline', 'role'],
+                           defaults=(None, None))
+TextOp = namedtuple('TextOp', ['position', 'text', 'font', 'color'])
+BadgeOp = namedtuple('BadgeOp', ['bbox', 'text', 'font', 'fg', 'bg', 'radius', 'text_offset'])
+PasteOp = namedtuple('PasteOp', ['position', 'size', 'asset'])
+GradientOp = namedtuple('GradientOp', ['bbox', 'stops', 'angle'])
+EllipseOp = namedtuple('EllipseOp', ['bbox', 'fill'])
+LineOp = namedtuple('LineOp', ['points', 'fill', 'width'])
+
+DISPLAY_OPS = {
+    'background': BackgroundOp,
+    'rect': RectOp,
+    'rrect': RoundedRectOp,
+    'text': TextOp,
+    'badge': BadgeOp,
+    'paste': PasteOp,
+    'gradient': GradientOp,
+    'ellipse': EllipseOp,
+    'line': LineOp,
+}
+_DISPLAY_OP_NAMES = {op: name for name, op in DISPLAY_OPS.items()}
+
+# ``chrome`` holds the elements that do not depend on the package (accent
+# bar, logo plate, logo); they are pre-rendered per theme and size
+LayoutPlan = namedtuple('LayoutPlan', ['elements', 'fits', 'overflow', 'truncated', 'chrome'])
+
+# Size of a banner in layout units (rendering multiplies it by a scale), and
+# how blocks flow on it: the logo goes on the 'right' of the title or on 'top'
+# of it, and ``center`` spreads spare height evenly above and below the content
+Canvas = namedtuple('Canvas', ['width', 'height', 'padding', 'logo', 'center'],
+                    defaults=('right', False))
+
+DEFAULT_CANVAS = Canvas(IMG_WIDTH, IMG_HEIGHT, PADDING)
+
+LayoutTemplate = namedtuple('LayoutTemplate', ['name', 'description', 'canvas'])
+
+# Named layouts for the places banners get published; every template re-flows
+# the same blocks, so one package renders all of them from shared assets
+LAYOUT_TEMPLATES = {
+    'og': LayoutTemplate('og', 'OpenGraph (GitHub, Facebook, LinkedIn)', DEFAULT_CANVAS),
+    'twitter': LayoutTemplate('twitter', 'Twitter/X summary card', Canvas(1200, 675, PADDING, center=True)),
+    'square': LayoutTemplate('square', 'Square post (Instagram, Mastodon)',
+                             Canvas(1080, 1080, PADDING, logo='top', center=True)),
+}
+
+DEFAULT_TEMPLATE = 'og'
+
+def scaled_size(canvas, scale):
+    """Pixel size of a canvas rendered at ``scale``"""
+    return round(canvas.width * scale), round(canvas.height * scale)
+
+def describe_sizes(scales, templates=(DEFAULT_TEMPLATE,)):
+    """Human-readable pixel sizes, e.g. '1200x630px, 2400x1260px (2x)'"""
+    sizes = []
+    for name in templates:
+        label = "" if tuple(templates) == (DEFAULT_TEMPLATE,) else f"{name} "
+        for scale in scales:
+            width, height = scaled_size(LAYOUT_TEMPLATES[name].canvas, scale)
+            sizes.append(f"{label}{width}x{height}px" + ("" if scale == 1 else f" ({scale:g}x)"))
+    return ", ".join(sizes)
+
+def scale_suffix(scale):
+    """File name suffix for a scale: '' for 1x, '@2x', '@0.5x', ..."""
+    return "" if scale == 1 else f"@{scale:g}x"
+
+def derive_scales(img, scale, scales, canvas=DEFAULT_CANVAS):
+    """Downsample a render made at ``scale`` to each of ``scales``
+    
+    Integer factors use ``Image.reduce`` (a box filter, and much faster than
+    resampling); other factors use Lanczos. Returns ``[(scale, image)]`` in
+    the order of ``scales``.
+    """
+    variants = []
+    source = img
+    for target in scales:
+        size = scaled_size(canvas, target)
+        factor = scale / target
+        if size == img.size:
+            variants.append((target, img))
+            continue
+        if source.mode == 'P':
+            source = img.convert('RGB')  # palette images cannot be resampled
+        if factor == int(factor) and img.width == size[0] * int(factor) \
+                and img.height == size[1] * int(factor):
+            variant = source.reduce(int(factor))
+        else:
+            variant = source.resize(size, Image.LANCZOS)
+        variants.append((target, variant))
+    return variants
+
+class BannerLayout:
+    """Theme-independent geometry and text masks for one package
+    
+    Produced once per package by ``prepare_layout`` and colourised for any
+    number of themes by ``compose``. ``width``/``height`` are in pixels, i.e.
+    the canvas multiplied by ``scale``.
+    """
+    
+    def __init__(self, width, height, elements, adjustments=(), scale=1, chrome=()):
+        self.width = width
+        self.height = height
+        self.elements = elements
+        self.adjustments = list(adjustments)
+        self.scale = scale
+        self.chrome = list(chrome)
+
+def _tuplify(value):
+    """Turn JSON lists back into the tuples display list ops are built from"""
+    if isinstance(value, list):
+        return tuple(_tuplify(item) for item in value)
+    return value
+
+class DisplayList:
+    """Theme-independent draw operations for one banner, in canvas units
+    
+    Produced by the layout planner (see ``display_list``) and consumed by a
+    backend: ``rasterize`` turns it into a BannerLayout at any scale without
+    running the layout again. The first ``static`` ops do not depend on the
+    package (the background and the chrome). Display lists compare by value
+    and round-trip through ``to_json``/``from_json``, so they can be cached
+    or shipped elsewhere.
+    """
+    
+    def __init__(self, width, height, ops, static=0, adjustments=()):
+        self.width = width
+        self.height = height
+        self.ops = list(ops)
+        self.static = static
+        self.adjustments = list(adjustments)
+    
+    def __eq__(self, other):
+        return isinstance(other, DisplayList) and self.to_dict() == other.to_dict()
+    
+    def __repr__(self):
+        return f"DisplayList({self.width}x{self.height}, {len(self.ops)} ops)"
+    
+    def to_dict(self):
+        return {
+            'width': self.width,
+            'height': self.height,
+            'static': self.static,
+            'adjustments': self.adjustments,
+            'ops': [{'op': _DISPLAY_OP_NAMES[type(op)], **op._asdict()} for op in self.ops],
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        ops = []
+        for entry in data['ops']:
+            fields = {key: _tuplify(value) for key, value in entry.items() if key != 'op'}
+            ops.append(DISPLAY_OPS[entry['op']](**fields))
+        return cls(data['width'], data['height'], ops, data.get('static', 0), data.get('adjustments', ()))
+    
+    def to_json(self):
+        return json.dumps(self.to_dict(), separators=(',', ':'))
+    
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+def background_ops(theme, width, height, scale=1):
+    """Expand a theme's background into concrete display list ops
+    
+    Sizes are in the pixels of a ``width`` x ``height`` render at ``scale``
+    (the glass circles and the neon grid grow with the scale).
+    """
+    canvas = (0, 0, width - 1, height - 1)
+    if theme['type'] in GRADIENT_THEME_TYPES:
+        return [GradientOp(canvas, theme.stops, theme.get('bg_angle', 90))]
+    
+    ops = [RectOp(canvas, theme.rgb['bg'])]
+    if theme['type'] == 'glassmorphism':
+        # Semi-transparent circles for depth
+        color = (*theme.rgb['accent'], 30)
         for i in range(5):
             x = int(width * (0.2 + i * 0.15))
             y = int(height * (0.1 + i * 0.2))
-            size = 150 + i * 50
-            color = tuple(int(theme['accent'][j:j+2], 16) for j in (1, 3, 5))
-            color = (*color, 30)  # Semi-transparent
-            
-            # Create overlay for blur effect
-            overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-            overlay_draw = ImageDraw.Draw(overlay)
-            overlay_draw.ellipse([x, y, x + size, y + size], fill=color)
-            
-            img = Image.alpha_composite(img.convert('RGBA'), overlay).convert('RGB')
+            size = round((150 + i * 50) * scale)
+            ops.append(EllipseOp((x, y, x + size, y + size), color))
+    elif theme['type'] == 'neon':
+        # Grid lines for the cyberpunk effect
+        spacing = max(1, round(50 * scale))
+        line_width = max(1, round(scale))
+        color = theme.rgb['primary']
+        ops.extend(LineOp(((x, 0), (x, height)), color, line_width) for x in range(0, width, spacing))
+        ops.extend(LineOp(((0, y), (width, y)), color, line_width) for y in range(0, height, spacing))
+    return ops
+
+def _scale_op(op, scale):
+    """Convert a gradient, ellipse or line op from canvas units to pixels at ``scale``"""
+    def px(value):
+        return round(value * scale)
+    
+    if isinstance(op, LineOp):
+        return op._replace(points=tuple((px(x), px(y)) for x, y in op.points),
+                           width=max(1, px(op.width)))
+    return op._replace(bbox=tuple(px(v) for v in op.bbox))
+
+def _shift_element(element, dy):
+    """Move a planned display list op down by ``dy``"""
+    if isinstance(element, (RectOp, RoundedRectOp, BadgeOp)):
+        x1, y1, x2, y2 = element.bbox
+        return element._replace(bbox=(x1, y1 + dy, x2, y2 + dy))
+    x, y = element.position
+    return element._replace(position=(x, y + dy))
+
+def _chrome_signature(element):
+    """Hashable identity of a chrome element, for the chrome cache key"""
+    if isinstance(element, LayoutImage):
+        return ('image', tuple(element.position), id(element.asset))
+    return ('box', tuple(element.bbox), element.radius, element.fill, element.outline, element.role)
+
+def _theme_color(theme, color):
+    """Resolve a layout colour against a theme"""
+    if color is None:
+        return None
+    candidates = color if isinstance(color, tuple) else (color,)
+    for slot in candidates:
+        if slot in theme:
+            return theme.rgb[slot] if isinstance(theme, Theme) else theme[slot]
+    return candidates[-1]
+
+LogoAsset = namedtuple('LogoAsset', ['image', 'mask'])
+
+class LRUCache:
+    """Thread-safe mapping with least-recently-used eviction and hit counters
+    
+    ``lookup`` returns the value cached for a key, building and storing it
+    on a miss; the build runs outside the lock so a slow one doesn't block
+    other threads. Beyond ``max_entries`` (None for no limit) the least
+    recently used entries are dropped.
+    """
+    
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def lookup(self, key, build):
+        """Return the value for ``key``, calling ``build()`` to create it on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
         
-        return img
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+    
+    def discard(self, predicate):
+        """Drop every entry whose key matches ``predicate``"""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+    
+    def stats(self):
+        """Return hit/miss counters and the hit rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries),
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
+    
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+class LogoCache(LRUCache):
+    """Decoded and resized logos, shared by every banner in the process
     
-    def _create_neon_background(self, width, height, theme):
-        """Create neon cyberpunk background"""
-        img = Image.new('RGB', (width, height), theme['bg'])
-        draw = ImageDraw.Draw(img)
+    Entries are keyed by ``(path, mtime, size)``, so editing the logo file
+    on disk invalidates the cached copy automatically.
+    """
+    
+    def get(self, path, size):
+        """Return a LogoAsset for ``path`` resized to ``size``, or None if missing"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
         
-        # Add grid lines for cyberpunk effect
-        grid_spacing = 50
-        grid_color = tuple(int(theme['primary'][i:i+2], 16) for i in (1, 3, 5))
+        key = (os.path.abspath(path), mtime, tuple(size))
         
-        for x in range(0, width, grid_spacing):
-            draw.line([(x, 0), (x, height)], fill=grid_color, width=1)
+        def load():
+            # Forget older versions of the same file at the same size
+            self.discard(lambda k: k[0] == key[0] and k[2] == key[2])
+            return self._load(path, tuple(size))
         
-        for y in range(0, height, grid_spacing):
-            draw.line([(0, y), (width, y)], fill=grid_color, width=1)
+        return self.lookup(key, load)
+    
+    def _load(self, path, size):
+        """Decode, shrink and resample a logo once"""
+        with Image.open(path) as source:
+            # Let JPEG sources decode at a reduced scale straight away
+            source.draft(source.mode, (size[0] * 2, size[1] * 2))
+            logo = source.convert("RGBA")
         
-        return img
+        # Cheap box reduction first for large sources, LANCZOS for the rest
+        factor = min(logo.width // (size[0] * 2), logo.height // (size[1] * 2))
+        if factor > 1:
+            logo = logo.reduce(factor)
+        logo = logo.resize(size, Image.LANCZOS)
+        
+        return LogoAsset(logo, logo.getchannel('A'))
+
+LOGO_CACHE = LogoCache()
+
+class ShapeCache(LRUCache):
+    """Anti-aliased rounded-rectangle masks, reused across banners
     
-    def _draw_rounded_rect(self, draw, bbox, radius, fill=None, outline=None):
-        """Draw rounded rectangle"""
-        x1, y1, x2, y2 = bbox
+    Masks are drawn at ``supersample`` times their size and box-reduced, and
+    keyed by ``(width, height, radius, stroke)``; ``stroke`` 0 is a filled
+    shape, anything else an outline of that width. Cards and badges repeat
+    the same few sizes, so after the first banner a shape costs a handful
+    of pastes (see ``paste_rounded_rect``).
+    """
+    
+    def __init__(self, max_shapes=256, supersample=4):
+        super().__init__(max_shapes)
+        self.supersample = supersample
+    
+    def rounded_rect(self, width, height, radius, stroke=0):
+        """Return an 'L' mask of a ``width`` x ``height`` rounded rectangle"""
+        return self._get(width, height, radius, stroke)[0]
+    
+    def paste_rounded_rect(self, img, color, xy, size, radius, stroke=0):
+        """Paste a rounded rectangle of ``color`` onto ``img`` at ``xy``
+        
+        Only the corner squares are anti-aliased; everything else in the mask
+        is fully on or off, so the straight parts are pasted as solid boxes
+        and only the corners go through the mask.
+        """
+        width, height = size
+        mask, corners = self._get(width, height, radius, stroke)
+        x1, y1 = xy
+        x2, y2 = x1 + width, y1 + height
+        c = corners[0].width if corners else 0
+        
+        if stroke:
+            s = stroke
+            boxes = [(x1 + c, y1, x2 - c, y1 + s), (x1 + c, y2 - s, x2 - c, y2),
+                     (x1, y1 + c, x1 + s, y2 - c), (x2 - s, y1 + c, x2, y2 - c)]
+        else:
+            boxes = [(x1 + c, y1, x2 - c, y2), (x1, y1 + c, x1 + c, y2 - c),
+                     (x2 - c, y1 + c, x2, y2 - c)]
+        for box in boxes:
+            if box[2] > box[0] and box[3] > box[1]:
+                img.paste(color, box)
+        
+        if corners:
+            positions = [(x1, y1), (x2 - c, y1), (x1, y2 - c), (x2 - c, y2 - c)]
+            for position, corner in zip(positions, corners):
+                img.paste(color, position, corner)
+    
+    def _get(self, width, height, radius, stroke):
+        """Return ``(mask, corner masks)`` for a shape, drawing it on a miss"""
+        def draw():
+            mask = self._draw(width, height, radius, stroke)
+            c = min(radius, width // 2, height // 2)
+            corners = ()
+            if c > 0:
+                corners = tuple(mask.crop((x, y, x + c, y + c)) for x, y in
+                                [(0, 0), (width - c, 0), (0, height - c), (width - c, height - c)])
+            return mask, corners
+        
+        return self.lookup((width, height, radius, stroke), draw)
+    
+    def _draw(self, width, height, radius, stroke):
+        """Rasterize one mask at the supersampled size"""
+        ss = self.supersample
+        big = Image.new('L', (width * ss, height * ss), 0)
+        draw = ImageDraw.Draw(big)
+        outer = [0, 0, width * ss - 1, height * ss - 1]
+        draw.rounded_rectangle(outer, radius * ss, fill=255)
+        if stroke:
+            inset = stroke * ss
+            inner = [inset, inset, width * ss - 1 - inset, height * ss - 1 - inset]
+            if inner[2] > inner[0] and inner[3] > inner[1]:
+                draw.rounded_rectangle(inner, max(radius - stroke, 0) * ss, fill=0)
+        return big.reduce(ss)
+
+SHAPE_CACHE = ShapeCache()
+
+class GlyphAtlas(LRUCache):
+    """Rasterized glyph masks, composed into text runs
+    
+    Glyph masks are keyed by ``(font, character)``; a font object is one
+    face at one size. A run is built by pasting its glyphs at the pen
+    positions of Pillow's basic layout (hinted advances plus kerning,
+    rounded to whole pixels), which reproduces ``ImageDraw.text`` exactly.
+    Titles and install commands share most of their glyphs across a
+    catalogue, so only characters not seen before go through FreeType.
+    """
+    
+    def __init__(self, max_glyphs=4096, max_advances=16384):
+        super().__init__(max_glyphs)
+        self.max_advances = max_advances
+        self._advances = {}
+        self.fallbacks = 0
+    
+    def _glyph(self, font, char):
+        """Return ``(mask, left, top)`` for one character, or None if it has no ink"""
+        def rasterize():
+            left, top, right, bottom = font.getbbox(char)
+            if right <= left or bottom <= top:
+                return None
+            mask = Image.new('L', (right - left, bottom - top), 0)
+            ImageDraw.Draw(mask).text((-left, -top), char, font=font, fill=255)
+            return mask, left, top
+        
+        return self.lookup((font, char), rasterize)
+    
+    def _advance(self, font, char, following):
+        """Advance from ``char`` to ``following``, kerning included"""
+        key = (font, char, following)
+        value = self._advances.get(key)
+        if value is None:
+            if len(self._advances) >= self.max_advances:
+                self._advances.clear()
+            value = self._advances[key] = font.getlength(char + following) - font.getlength(following)
+        return value
+    
+    def render(self, text, font):
+        """Rasterize ``text`` cropped to its ink box
         
-        if radius <= 0:
-            draw.rectangle(bbox, fill=fill, outline=outline)
+        Returns ``(left, top, mask)`` like drawing at the origin and
+        cropping to ``font.getbbox(text)``; ``mask`` is None for a run
+        without ink.
+        """
+        left, top, right, bottom = font.getbbox(text)
+        if right <= left or bottom <= top:
+            return left, top, None
+        
+        mask = Image.new('L', (right - left, bottom - top), 0)
+        if '\n' in text or font.layout_engine != ImageFont.Layout.BASIC:
+            # Multiline text and complex shaping don't compose glyph by glyph
+            with self._lock:
+                self.fallbacks += 1
+            ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255)
+            return left, top, mask
+        
+        pen = 0.0
+        last = len(text) - 1
+        for i, char in enumerate(text):
+            glyph = self._glyph(font, char)
+            if glyph is not None:
+                glyph_mask, glyph_left, glyph_top = glyph
+                mask.paste(255, (math.floor(pen + 0.5) + glyph_left - left, glyph_top - top), glyph_mask)
+            if i < last:
+                pen += self._advance(font, char, text[i + 1])
+        return left, top, mask
+    
+    def stats(self):
+        """Return glyph hit/miss counters, the hit rate and the fallback count"""
+        stats = super().stats()
+        stats['fallbacks'] = self.fallbacks
+        return stats
+    
+    def clear(self):
+        """Drop all cached glyphs and advances and reset the counters"""
+        super().clear()
+        with self._lock:
+            self._advances.clear()
+            self.fallbacks = 0
+
+GLYPH_ATLAS = GlyphAtlas()
+
+class BadgeCache(LRUCache):
+    """Pre-rendered RGBA badge sprites
+    
+    Sprites are keyed by ``(text, font, fg, bg, radius, size, text_offset)``.
+    Badge strings such as ``Python >=3.8+`` repeat across a whole catalogue,
+    so most badges are a single paste of an existing sprite.
+    """
+    
+    def __init__(self, max_badges=512, shapes=None):
+        super().__init__(max_badges)
+        self.shapes = shapes or SHAPE_CACHE
+    
+    def sprite(self, text, font, fg, bg, radius, size, text_offset):
+        """Return the RGBA sprite for a badge, rendering it on a miss"""
+        def render():
+            sprite = Image.new('RGB', size, bg)
+            left, top, mask = GLYPH_ATLAS.render(text, font)
+            if mask is not None:
+                sprite.paste(fg, (text_offset[0] + left, text_offset[1] + top), mask)
+            sprite.putalpha(self.shapes.rounded_rect(size[0], size[1], radius))
+            return sprite
+        
+        return self.lookup((text, font, fg, bg, radius, size, text_offset), render)
+
+BADGE_CACHE = BadgeCache()
+
+# Theme types drawn on a flat background, which palette mode renders once
+# into an indexed image and recolours per theme (see ``IndexedBanner``)
+PALETTE_THEME_TYPES = ('professional', 'minimal', 'material')
+PALETTE_LEVELS = 16  # coverage steps between two colour slots, ends included
+PALETTE_IMAGE_COLORS = 64  # palette entries reserved for each pasted image
+
+class PaletteFull(Exception):
+    """Raised when a layout needs more colours than a palette can hold"""
+
+class IndexedBanner:
+    """A layout rasterized once into palette indices, recoloured per theme
+    
+    Every colour the layout uses is a *slot*: a theme key such as ``card``,
+    or a literal colour such as ``white``. Each slot owns one palette entry,
+    and each pair of slots that meet at an anti-aliased edge owns a ramp of
+    ``PALETTE_LEVELS - 2`` entries blending the two. The indices therefore
+    do not depend on the theme, and rendering another theme is a
+    ``putpalette``. Images (the logo) cannot be expressed in slots; they are
+    quantized into a reserved range of the palette for each theme.
+    """
+    
+    def __init__(self, width, height, background):
+        self.index = Image.new('L', (width, height), 0)
+        self.slots = []
+        self.ramps = {}
+        self.images = []
+        self._entries = []  # palette entry -> ('slot', s) / ('ramp', f, s, level) / None
+        self._slot_entries = []
+        self._bases = [0] * 256  # palette entry -> code of its dominant slot
+        self._levels = [round(a * (PALETTE_LEVELS - 1) / 255) for a in range(256)]
+        self._cover = [255 if level else 0 for level in self._levels]
+        self._quantized = {}
+        self._slot(background)
+    
+    def _allocate(self, entry):
+        if len(self._entries) >= 256:
+            raise PaletteFull("more than 256 colours")
+        self._entries.append(entry)
+        return len(self._entries) - 1
+    
+    def _slot(self, name):
+        """Return the number of a slot, giving it a palette entry on first use"""
+        if name not in self.slots:
+            if (len(self.slots) + 1) * PALETTE_LEVELS > 256:
+                raise PaletteFull("too many colour slots")
+            self.slots.append(name)
+            slot = len(self.slots) - 1
+            entry = self._allocate(('slot', slot))
+            self._bases[entry] = slot * PALETTE_LEVELS
+            self._slot_entries.append(entry)
+        return self.slots.index(name)
+    
+    def _ramp(self, fg, bg):
+        """Return the first palette entry of the ``fg`` over ``bg`` ramp"""
+        start = self.ramps.get((fg, bg))
+        if start is None:
+            for level in range(1, PALETTE_LEVELS - 1):
+                dominant = fg if level * 2 >= PALETTE_LEVELS - 1 else bg
+                entry = self._allocate(('ramp', fg, bg, level))
+                self._bases[entry] = dominant * PALETTE_LEVELS
+                start = entry if level == 1 else start
+            self.ramps[(fg, bg)] = start
+        return start
+    
+    def fill(self, name, mask, xy):
+        """Paint slot ``name`` through an 'L' coverage ``mask`` placed at ``xy``
+        
+        Coverage is quantized to ``PALETTE_LEVELS`` steps. Where the pixel
+        underneath is itself a blend, the new ramp starts from its dominant
+        slot.
+        """
+        x, y = xy
+        left, top = max(x, 0), max(y, 0)
+        right = min(x + mask.width, self.index.width)
+        bottom = min(y + mask.height, self.index.height)
+        if right <= left or bottom <= top:
             return
-            
-        # Main rectangles
-        draw.rectangle([x1 + radius, y1, x2 - radius, y2], fill=fill, outline=outline)
-        draw.rectangle([x1, y1 + radius, x2, y2 - radius], fill=fill, outline=outline)
-        
-        # Corners
-        draw.pieslice([x1, y1, x1 + radius*2, y1 + radius*2], 180, 270, fill=fill, outline=outline)
-        draw.pieslice([x2 - radius*2, y1, x2, y1 + radius*2], 270, 360, fill=fill, outline=outline)
-        draw.pieslice([x1, y2 - radius*2, x1 + radius*2, y2], 90, 180, fill=fill, outline=outline)
-        draw.pieslice([x2 - radius*2, y2 - radius*2, x2, y2], 0, 90, fill=fill, outline=outline)
-    
-    def _wrap_text(self, text, font, max_width, draw):
-        """Wrap text to fit width"""
-        words = text.split()
-        lines = []
-        current_line = ""
-        
-        for word in words:
-            test_line = f"{current_line}{word} ".strip()
-            if draw.textlength(test_line, font=font) <= max_width:
-                current_line = f"{current_line}{word} "
+        if (left, top, right, bottom) != (x, y, x + mask.width, y + mask.height):
+            mask = mask.crop((left - x, top - y, right - x, bottom - y))
+        box = (left, top, right, bottom)
+        
+        fg = self._slot(name)
+        levels = mask.point(self._levels)
+        bases = self.index.crop(box).point(self._bases)
+        histogram = bases.histogram()
+        
+        table = [self._slot_entries[fg]] * 256
+        for bg in range(len(self.slots)):
+            if not histogram[bg * PALETTE_LEVELS] or bg == fg:
+                continue
+            start = self._ramp(fg, bg)
+            for level in range(1, PALETTE_LEVELS - 1):
+                table[bg * PALETTE_LEVELS + level] = start + level - 1
+        
+        codes = ImageChops.add(bases, levels)
+        self.index.paste(codes.point(table), box, mask.point(self._cover))
+    
+    def add_image(self, position, asset):
+        """Reserve palette entries for an image pasted over the layout"""
+        start = len(self._entries)
+        for _ in range(PALETTE_IMAGE_COLORS):
+            self._allocate(None)
+        self.images.append((start, position, asset))
+    
+    def palette(self, theme):
+        """Return the flat RGB palette of the slots and ramps for ``theme``"""
+        colors = [_hex_to_rgb(_theme_color(theme, name)) for name in self.slots]
+        palette = []
+        for entry in self._entries:
+            if entry is None:
+                rgb = (0, 0, 0)
+            elif entry[0] == 'slot':
+                rgb = colors[entry[1]]
             else:
-                if current_line:
-                    lines.append(current_line.strip())
-                current_line = f"{word} "
+                _, fg, bg, level = entry
+                t = level / (PALETTE_LEVELS - 1)
+                rgb = tuple(round(b + (f - b) * t) for f, b in zip(colors[fg], colors[bg]))
+            palette.extend(rgb)
+        return palette
+    
+    def render(self, theme):
+        """Return the banner as a 'P' image in ``theme``'s colours"""
+        palette = self.palette(theme)
+        img = self.index.copy()
+        for start, position, asset in self.images:
+            indices, colors = self._quantize(start, position, asset, palette)
+            img.paste(indices, position, asset.mask.point(lambda a: 255 if a else 0))
+            palette[start * 3:start * 3 + len(colors)] = colors
+        img.putpalette(palette)
+        return img
+    
+    def _quantize(self, start, position, asset, palette):
+        """Quantize an image over its themed surroundings, cached per palette"""
+        key = (start, tuple(palette))
+        cached = self._quantized.get(key)
+        if cached is None:
+            x, y = position
+            under = self.index.crop((x, y, x + asset.image.width, y + asset.image.height))
+            under.putpalette(palette)
+            under = under.convert('RGB')
+            under.paste(asset.image, (0, 0), asset.mask)
+            quantized = under.quantize(PALETTE_IMAGE_COLORS)
+            indices = Image.frombytes('L', quantized.size, quantized.tobytes())
+            colors = quantized.getpalette()[:PALETTE_IMAGE_COLORS * 3]
+            offset = [start + min(i, PALETTE_IMAGE_COLORS - 1) for i in range(256)]
+            cached = (indices.point(offset), colors)
+            if len(self._quantized) >= 16:
+                self._quantized.clear()
+            self._quantized[key] = cached
+        return cached
+
+# Embedded SVG fonts cover all of printable ASCII when a banner needs no
+# more, so one subset per face serves almost every banner in a catalogue
+SVG_FONT_CHARSET = frozenset(map(chr, range(0x20, 0x7f)))
+
+# Characters XML 1.0 does not allow, even escaped
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+def _svg_text(text):
+    """Escape a text run for an SVG document"""
+    return _XML_INVALID.sub('', text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+def _svg_number(value):
+    """Format a coordinate compactly (integers stay integers)"""
+    return str(value) if isinstance(value, int) else f"{round(value, 2):g}"
+
+def _svg_color(color):
+    """Format a resolved colour for SVG (RGB tuples become hex)"""
+    if isinstance(color, tuple):
+        return '#%02x%02x%02x' % color[:3]
+    return color
+
+def _data_uri(mime, data):
+    return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+def _subset_font(data, chars):
+    """Subset a TrueType font to ``chars`` as WOFF (needs fontTools)"""
+    options = font_subset.Options()
+    options.flavor = 'woff'
+    options.hinting = False
+    options.layout_features = ['kern']
+    options.drop_tables += ['FFTM']
+    font = font_subset.load_font(io.BytesIO(data), options)
+    subsetter = font_subset.Subsetter(options)
+    subsetter.populate(text=chars)
+    subsetter.subset(font)
+    out = io.BytesIO()
+    font_subset.save_font(font, out, options)
+    return out.getvalue()
+
+class SVGAssets(LRUCache):
+    """The ``data:`` URIs SVG banners embed
+    
+    Fonts are subset when fontTools is installed: to ``SVG_FONT_CHARSET``
+    when that covers the banner's text, to exactly the characters used
+    otherwise. Without fontTools they are embedded whole (one URI per face,
+    so the base64 encoding happens once). Images are PNG-encoded once each.
+    """
+    
+    def __init__(self, max_entries=256):
+        super().__init__(max_entries)
+    
+    def font(self, font_manager, face, chars):
+        """Return a ``data:`` URI for ``face`` that covers at least ``chars``"""
+        path = font_manager.faces[face]
+        if font_subset is None:
+            return self.lookup(('font', path), lambda: _data_uri('font/ttf', font_manager.font_data(face)))
+        chars = set(chars)
+        chars = ''.join(sorted(SVG_FONT_CHARSET if chars <= SVG_FONT_CHARSET else chars))
+        return self.lookup(('font', path, chars), lambda: _data_uri(
+            'font/woff', _subset_font(font_manager.font_data(face), chars)))
+    
+    def image(self, image, optimize=False):
+        """Return a PNG ``data:`` URI for an image"""
+        def build():
+            buffer = io.BytesIO()
+            image.save(buffer, 'PNG', optimize=optimize)
+            return (image, _data_uri('image/png', buffer.getvalue()))
         
-        if current_line:
-            lines.append(current_line.strip())
+        key = ('image', id(image), optimize)
+        entry = self.lookup(key, build)
+        if entry[0] is not image:  # a new image reusing a collected one's id
+            self.discard(lambda k: k == key)
+            entry = self.lookup(key, build)
+        return entry[1]
+
+SVG_ASSETS = SVGAssets()
+
+def _version_badge(package_data):
+    version = package_data.get('version')
+    return f"v{version}" if version else None
+
+def _python_badge(package_data):
+    requires_python = package_data.get('requires_python')
+    return f"Python {requires_python}+" if requires_python else None
+
+def _classifier(package_data, prefix):
+    """Last part of the first trove classifier under ``prefix``, or None"""
+    for classifier in package_data.get('classifiers') or ():
+        if classifier.startswith(prefix + ' :: '):
+            return classifier.rsplit(' :: ', 1)[-1]
+    return None
+
+def _license_badge(package_data):
+    license_name = (package_data.get('license') or '').strip()
+    # Some projects paste the whole license text; use the classifier instead
+    if not license_name or len(license_name) > 30 or '\n' in license_name:
+        license_name = _classifier(package_data, 'License')
+    return license_name or None
+
+def _status_badge(package_data):
+    status = _classifier(package_data, 'Development Status')
+    # 'Development Status :: 5 - Production/Stable' -> 'Production/Stable'
+    return status.split(' - ', 1)[-1] if status else None
+
+# Badge types: ``text`` maps package data to the badge text (None to skip
+# the badge), ``role`` picks the font, ``fg``/``bg`` are theme slots (or
+# literal colours), and ``padding`` is the (horizontal, vertical) text inset
+BadgeType = namedtuple('BadgeType', ['text', 'role', 'fg', 'bg', 'radius', 'padding', 'height'])
+
+BADGE_TYPES = {
+    'version': BadgeType(_version_badge, 'version', 'white', 'accent', 14, (8, 4), 28),
+    'python': BadgeType(_python_badge, 'badge', 'white', ('border', 'accent'), 4, (6, 3), 24),
+    'license': BadgeType(_license_badge, 'badge', 'white', ('border', 'accent'), 4, (6, 3), 24),
+    'status': BadgeType(_status_badge, 'badge', 'white', ('border', 'accent'), 4, (6, 3), 24),
+}
+
+# The version badge sits under the title; the others share one row
+DEFAULT_BADGES = ('version', 'python')
+
+class PackageNotFoundError(Exception):
+    """Raised when PyPI has no project with the requested name"""
+
+def _normalize_package_data(package_name, data):
+    """Reduce a PyPI JSON document to the fields the banner uses"""
+    return {
+        'name': package_name,
+        'version': data['info'].get('version', ''),
+        'summary': data['info'].get('summary', ''),
+        'requires_python': data['info'].get('requires_python', ''),
+        'project_url': data['info'].get('project_url', f"https://pypi.org/project/{package_name}/"),
+        'author': data['info'].get('author', ''),
+        'license': data['info'].get('license_expression') or data['info'].get('license') or '',
+        'classifiers': data['info'].get('classifiers') or [],
+    }
+
+CacheEntry = namedtuple('CacheEntry', ['package_data', 'etag', 'last_modified', 'fetched_at'])
+
+class MetadataCache:
+    """Persistent SQLite cache of normalized package data
+    
+    Entries are keyed by index URL and package name, so a mirror and
+    pypi.org never serve each other's metadata. Each entry keeps the
+    ETag/Last-Modified validators of the response it came from so it can be
+    revalidated cheaply once it is older than ``ttl`` seconds.
+    """
+    
+    def __init__(self, path=None, ttl=METADATA_CACHE_TTL):
+        self.path = path or os.path.join(CACHE_DIR, "metadata.sqlite3")
+        self.ttl = ttl
+        self._setup()
+    
+    def _setup(self):
+        self._conn = None
+        self._disabled = False
+        self._lock = threading.Lock()
+    
+    def __getstate__(self):
+        return {'path': self.path, 'ttl': self.ttl}
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._setup()
+    
+    def _connection(self):
+        """Open the database on first use"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS package_metadata ("
+                " index_url TEXT NOT NULL,"
+                " name TEXT NOT NULL,"
+                " data TEXT NOT NULL,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " fetched_at REAL NOT NULL,"
+                " PRIMARY KEY (index_url, name))")
+            self._conn = conn
+        return self._conn
+    
+    def _execute(self, sql, params):
+        """Run a statement, disabling the cache if the database is unusable"""
+        if self._disabled:
+            return None
+        with self._lock:
+            try:
+                conn = self._connection()
+                with conn:
+                    return conn.execute(sql, params).fetchone()
+            except (sqlite3.Error, OSError) as e:
+                print(f"⚠️  Metadata cache disabled: {e}")
+                self._disabled = True
+                return None
+    
+    def get(self, package_name, index_url=PYPI_BASE_URL):
+        """Return the CacheEntry for a package on ``index_url``, or None"""
+        row = self._execute(
+            "SELECT data, etag, last_modified, fetched_at FROM package_metadata"
+            " WHERE index_url = ? AND name = ?",
+            (index_url.rstrip('/'), _canonical_name(package_name)))
+        if row is None:
+            return None
         
-        return lines
+        package_data = json.loads(row[0])
+        package_data['name'] = package_name
+        return CacheEntry(package_data, row[1], row[2], row[3])
     
-    def generate_banner(self, package_data, theme):
-        """Generate banner with specified theme"""
+    def put(self, package_name, package_data, etag=None, last_modified=None, index_url=PYPI_BASE_URL):
+        """Store package data freshly fetched from ``index_url``"""
+        self._execute(
+            "INSERT OR REPLACE INTO package_metadata"
+            " (index_url, name, data, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (index_url.rstrip('/'), _canonical_name(package_name), json.dumps(package_data),
+             etag, last_modified, time.time()))
+    
+    def touch(self, package_name, index_url=PYPI_BASE_URL):
+        """Mark an entry as fresh again after a successful revalidation"""
+        self._execute("UPDATE package_metadata SET fetched_at = ? WHERE index_url = ? AND name = ?",
+                      (time.time(), index_url.rstrip('/'), _canonical_name(package_name)))
+    
+    def is_fresh(self, entry):
+        """Whether an entry can be served without asking PyPI"""
+        return time.time() - entry.fetched_at < self.ttl
+
+class PyPIClient:
+    """Pooled, concurrent client for the PyPI JSON API
+    
+    Connections are kept alive in a pool sized for ``max_workers`` parallel
+    lookups, and concurrent requests for the same package share a single
+    HTTP call. With a MetadataCache, fresh entries are served without any
+    request, older ones are revalidated with If-None-Match/If-Modified-Since,
+    and stale entries are used when PyPI cannot be reached.
+    """
+    
+    def __init__(self, base_url=PYPI_BASE_URL, timeout=10, max_workers=8, cache=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.cache = cache
+        self._setup()
+    
+    def _setup(self):
+        """Create the session, pool and coalescing state"""
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._inflight = {}
+        self._lock = threading.Lock()
+    
+    def __getstate__(self):
+        # Sessions and locks are per process; rebuild them after unpickling
+        return {'base_url': self.base_url, 'timeout': self.timeout,
+                'max_workers': self.max_workers, 'cache': self.cache}
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._setup()
+    
+    def _coalesce(self, key, func):
+        """Run ``func`` once for all concurrent callers using the same key"""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        
+        # Somebody else is already fetching this package: wait for their result
+        if not leader:
+            return future.result()
         
-        # Create background based on theme type
-        if theme['type'] in ['gradient', 'synthwave']:
-            img = self._create_gradient_background(IMG_WIDTH, IMG_HEIGHT, 
-                                                 theme['bg_start'], theme['bg_end'])
-        elif theme['type'] == 'glassmorphism':
-            img = self._create_glassmorphism_background(IMG_WIDTH, IMG_HEIGHT, theme)
-        elif theme['type'] == 'neon':
-            img = self._create_neon_background(IMG_WIDTH, IMG_HEIGHT, theme)
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
         else:
-            img = Image.new('RGB', (IMG_WIDTH, IMG_HEIGHT), theme['bg'])
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+    
+    def _request(self, package_name, headers=None):
+        """Perform one HTTP lookup and return the response"""
+        response = self.session.get(f"{self.base_url}/pypi/{package_name}/json",
+                                    headers=headers, timeout=self.timeout)
+        if response.status_code == 404:
+            raise PackageNotFoundError(f"Package '{package_name}' not found on PyPI")
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+    
+    def get_package_data(self, package_name):
+        """Return the normalized package data used for rendering
+        
+        Raises PackageNotFoundError for unknown packages and
+        requests.RequestException for network or server errors.
+        """
+        return self._coalesce(_canonical_name(package_name), lambda: self._lookup(package_name))
+    
+    def _lookup(self, package_name):
+        """Serve from the cache, revalidate, or fetch"""
+        entry = self.cache.get(package_name, self.base_url) if self.cache else None
+        if entry is not None and self.cache.is_fresh(entry):
+            return entry.package_data
+        
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        
+        try:
+            response = self._request(package_name, headers)
+        except requests.RequestException:
+            # Offline or PyPI unavailable: a stale answer beats no answer
+            if entry is not None:
+                return entry.package_data
+            raise
+        
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(package_name, self.base_url)
+            return entry.package_data
+        
+        package_data = _normalize_package_data(package_name, response.json())
+        if self.cache:
+            self.cache.put(package_name, package_data, response.headers.get('ETag'),
+                           response.headers.get('Last-Modified'), self.base_url)
+        return package_data
+    
+    def fetch_many(self, package_names):
+        """Fetch several packages concurrently
+        
+        Yields ``(package_name, package_data, error)`` in input order as soon
+        as each result is available.
+        """
+        package_names = list(package_names)
+        if not package_names:
+            return
         
-        draw = ImageDraw.Draw(img)
+        def fetch(name):
+            try:
+                return self.get_package_data(name), None
+            except Exception as e:
+                return None, e
+        
+        workers = max(1, min(self.max_workers, len(package_names)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(fetch, name) for name in package_names]
+            for name, future in zip(package_names, futures):
+                yield (name, *future.result())
+
+# Encoder settings per output format and preset
+ENCODER_PRESETS = {
+    'png': {
+        'fast': {'compress_level': 1},
+        'balanced': {'compress_level': 6},
+        'smallest': {'compress_level': 9, 'optimize': True},
+    },
+    'webp': {
+        'fast': {'quality': 90, 'method': 0},
+        'balanced': {'quality': 90, 'method': 4},
+        'smallest': {'lossless': True, 'quality': 80, 'method': 4},
+    },
+    'jpeg': {
+        'fast': {'quality': 90},
+        'balanced': {'quality': 90, 'optimize': True},
+        'smallest': {'quality': 85, 'optimize': True, 'progressive': True},
+    },
+    # Options for ``render_svg``: 'fast' relies on installed DejaVu fonts
+    'svg': {
+        'fast': {'fonts': 'none'},
+        'balanced': {'fonts': 'embed'},
+        'smallest': {'fonts': 'embed', 'optimize': True},
+    },
+}
+DEFAULT_ENCODER_PRESET = 'balanced'
+
+EncodeResult = namedtuple('EncodeResult', ['path', 'seconds', 'size'])
+
+class BannerEncoder:
+    """Encodes banners with a named preset, optionally on a thread pool
+    
+    Pillow releases the GIL while encoding, so handing an image to
+    ``submit`` lets the next banner render while this one is compressed.
+    SVG banners are documents rather than images (see ``render_svg``);
+    the encoder only writes them out.
+    """
+    
+    FORMATS = {'png': ('PNG', '.png'), 'webp': ('WEBP', '.webp'), 'jpeg': ('JPEG', '.jpg'),
+               'svg': ('SVG', '.svg')}
+    
+    def __init__(self, fmt='png', preset=DEFAULT_ENCODER_PRESET, threads=2):
+        fmt = 'jpeg' if fmt.lower() == 'jpg' else fmt.lower()
+        if fmt not in ENCODER_PRESETS:
+            raise ValueError(f"Unknown output format '{fmt}'")
+        if preset not in ENCODER_PRESETS[fmt]:
+            raise ValueError(f"Unknown encoder preset '{preset}' for {fmt}")
+        
+        self.format = fmt
+        self.preset = preset
+        self.threads = threads
+        self._setup()
+    
+    def _setup(self):
+        self._pool = None
+        self._lock = threading.Lock()
+    
+    def __getstate__(self):
+        return {'format': self.format, 'preset': self.preset, 'threads': self.threads}
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._setup()
+    
+    @property
+    def extension(self):
+        return self.FORMATS[self.format][1]
+    
+    @property
+    def options(self):
+        return ENCODER_PRESETS[self.format][self.preset]
+    
+    def encode(self, img):
+        """Encode an image, returning ``(data, seconds)``"""
+        view, seconds = self.encode_view(img)
+        return view.tobytes(), seconds
+    
+    def encode_view(self, img):
+        """Encode an image in memory, returning ``(memoryview, seconds)``
+        
+        The view points straight into the encoder's buffer, so the encoded
+        data is never copied.
+        """
+        if isinstance(img, str):
+            start = time.perf_counter()
+            data = img.encode('utf-8')
+            return memoryview(data), time.perf_counter() - start
+        if self.format == 'svg':
+            raise ValueError("SVG banners are rendered from display lists, not images")
+        if self.format == 'jpeg' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        img.save(buffer, self.FORMATS[self.format][0], **self.options)
+        return buffer.getbuffer(), time.perf_counter() - start
+    
+    def save(self, img, path):
+        """Encode an image and write it to ``path``"""
+        data, seconds = self.encode_view(img)
+        with open(path, 'wb') as fh:
+            fh.write(data)
+        return EncodeResult(path, seconds, data.nbytes)
+    
+    def submit(self, img, path):
+        """Encode and write in the background, returning a Future of EncodeResult"""
+        if self.threads < 1:
+            future = Future()
+            try:
+                future.set_result(self.save(img, path))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.threads)
+        return self._pool.submit(self.save, img, path)
+    
+    def shutdown(self):
+        """Wait for pending encodes and release the thread pool"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+_file_fingerprints = {}
+
+def _file_fingerprint(path):
+    """Content hash of an asset file, cached per path, size and mtime"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _file_fingerprints.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b''):
+                sha.update(chunk)
+        digest = _file_fingerprints[key] = sha.hexdigest()
+    return digest
+
+def render_key(package_data, theme, encoding=None, scales=(1,), templates=(DEFAULT_TEMPLATE,),
+               badges=DEFAULT_BADGES, palette=False):
+    """Content hash identifying a rendered banner
+    
+    Covers everything that affects the output files: the package data, the
+    theme, the font and logo files, the layout templates, scales and badges,
+    whether palette mode is on, the renderer version and the
+    ``(format, preset)`` it is encoded with.
+    """
+    payload = {
+        'renderer': RENDERER_VERSION,
+        'package': package_data,
+        'theme': theme,
+        'fonts': [_file_fingerprint(FONT_BOLD), _file_fingerprint(FONT_REGULAR)],
+        'logo': _file_fingerprint(LOGO_PATH),
+        'templates': [[name, list(LAYOUT_TEMPLATES[name].canvas)] for name in templates],
+        'scales': list(scales),
+        'badges': list(badges),
+        'palette': bool(palette) and theme.get('type') in PALETTE_THEME_TYPES,
+        'encoding': encoding,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+# ``path``/``encoded`` describe the first requested scale, ``paths`` every file;
+# ``pooled`` is set when the banner was rendered by a process pool worker
+RenderResult = namedtuple('RenderResult', ['task', 'path', 'error', 'cached', 'encoded', 'paths', 'pooled'],
+                          defaults=((), False))
+
+class RenderCache:
+    """Index of rendered banners in an output directory, keyed by render_key()"""
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self._entries = None
+        self._dirty = False
+    
+    def __getstate__(self):
+        # Workers never consult the index; don't ship it to them
+        return {'directory': self.directory, '_entries': None, '_dirty': False}
+    
+    @property
+    def path(self):
+        return os.path.join(self.directory, RENDER_INDEX_NAME)
+    
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as fh:
+                    self._entries = json.load(fh).get('entries', {})
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+    
+    def lookup(self, key):
+        """Return the paths of an existing render for ``key``, or None"""
+        filenames = self._load().get(key)
+        if isinstance(filenames, str):
+            filenames = [filenames]
+        if filenames:
+            paths = [os.path.join(self.directory, filename) for filename in filenames]
+            if all(os.path.exists(path) for path in paths):
+                return paths
+        return None
+    
+    def record(self, key, paths):
+        """Remember that ``paths`` (one per output file) hold the render for ``key``"""
+        self._load()[key] = [os.path.relpath(path, self.directory) for path in paths]
+        self._dirty = True
+    
+    def save(self):
+        """Write the index back to disk if it changed"""
+        if not self._dirty:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump({'version': 1, 'entries': self._entries}, fh, indent=0, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+def _output_timestamp():
+    """Timestamp used in output file names"""
+    return datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+class UltimateBannerGenerator:
+    def __init__(self, jobs=None, client=None, output_dir=OUTPUT_DIR,
+                 render_cache=True, hash_names=False, force=False, encoder=None,
+                 font_manager=None, scales=(1,), templates=(DEFAULT_TEMPLATE,),
+                 badges=DEFAULT_BADGES, palette=False):
+        self.font_manager = font_manager or FontManager()
+        self.fonts = FontRoles(self.font_manager)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.client = client or PyPIClient()
+        self.output_dir = output_dir
+        self.render_cache = RenderCache(output_dir) if render_cache else None
+        self.hash_names = hash_names
+        self.force = force
+        self.encoder = encoder or BannerEncoder()
+        self.scales = tuple(scales)
+        self.templates = tuple(templates)
+        self.badges = tuple(badges)
+        self.palette = palette
+        self._setup_caches()
+    
+    def _setup_caches(self):
+        # Per-process render caches, shared by every template and package
+        self._measurers = {}
+        self._layouts = {}
+        self._masks = OrderedDict()
+        self._chromes = OrderedDict()
+        self._indexed = OrderedDict()
+        self._display_lists = OrderedDict()
+    
+    def __getstate__(self):
+        # Pool workers build their own caches instead of unpickling ours
+        state = self.__dict__.copy()
+        for name in ('_measurers', '_layouts', '_masks', '_chromes', '_indexed', '_display_lists'):
+            del state[name]
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._setup_caches()
+        
+    def _draw_rounded_rect(self, img, bbox, radius, fill=None, outline=None, width=1):
+        """Paste an anti-aliased rounded rectangle (``bbox`` is inclusive)"""
+        x1, y1, x2, y2 = bbox
+        size = (x2 - x1 + 1, y2 - y1 + 1)
+        
+        if radius <= 0 and not outline:
+            img.paste(fill, (x1, y1, x2 + 1, y2 + 1))
+            return
+        
+        if fill:
+            SHAPE_CACHE.paste_rounded_rect(img, fill, (x1, y1), size, radius)
+        if outline:
+            SHAPE_CACHE.paste_rounded_rect(img, outline, (x1, y1), size, radius, width)
+    
+    def _measurer(self, font):
+        """Return the shared TextMeasurer for a font"""
+        measurer = self._measurers.get(id(font))
+        if measurer is None or measurer.font is not font:
+            measurer = self._measurers[id(font)] = TextMeasurer(font)
+        return measurer
+    
+    def _create_background(self, theme, width, height, scale=1):
+        """Create background based on theme type (see ``background_ops``)"""
+        ops = background_ops(theme, width, height, scale)
+        base = ops[0]
+        if isinstance(base, GradientOp):
+            img = create_gradient(width, height, base.stops, base.angle)
+        else:
+            img = Image.new('RGB', (width, height), base.fill)
+        self._draw_elements(img, ops[1:], theme, scale)
+        return img
+    
+    def _text_element(self, position, text, font, color):
+        """Rasterize text once into a single-channel mask cropped to its ink
+        
+        Masks are cached by text and font, so the same run in another
+        template (or another package) is not rasterized again; new runs
+        are composed from the glyph atlas.
+        """
+        key = (text, font)
+        cached = self._masks.pop(key, None)
+        if cached is None:
+            cached = GLYPH_ATLAS.render(text, font)
+        self._masks[key] = cached
+        while len(self._masks) > 512:
+            self._masks.popitem(last=False)
+        
+        left, top, mask = cached
+        if mask is None:
+            return None
+        return LayoutText((position[0] + left, position[1] + top), mask, color)
+    
+    def _logo_asset(self, logo_size=100):
+        """Return the cached logo asset, or None if there is no usable logo"""
+        try:
+            return LOGO_CACHE.get(LOGO_PATH, (logo_size, logo_size))
+        except Exception as e:
+            print(f"Logo error: {e}")
+            return None
+    
+    def _plan_layout(self, package_data, fit, logo, canvas, shorten=False):
+        """Position every block for one auto-fit step, without rasterizing
+        
+        With ``shorten`` the title, summary lines, badges and install command
+        are cut with an ellipsis when they are still too wide (the last
+        resort).
+        """
+        title_size, desc_size, cmd_size, summary_lines = fit
+        font_keys = {'url': self.fonts.roles['url']}
+        for role, size in (('title', title_size), ('desc', desc_size), ('cmd', cmd_size)):
+            font_keys[role] = (self.fonts.roles[role][0], size)
+        fonts = {role: self.font_manager.get(*key) for role, key in font_keys.items()}
+        elements = []
+        truncated = []
+        
+        padding = canvas.padding
         
         # Content area (leave space for logo if it exists)
-        logo_space = 140 if os.path.exists(LOGO_PATH) else 0
-        content_width = IMG_WIDTH - 2 * PADDING - logo_space
+        logo_size = 100
+        content_width = self._content_width(logo, canvas)
+        content_right = padding + content_width
+        badge_overflow = summary_overflow = -content_width
+        
+        def plan_badge(kind, x):
+            badge = self._plan_badge(kind, package_data, x, y, content_right if shorten else None)
+            if badge is not None and badge.text != BADGE_TYPES[kind].text(package_data):
+                truncated.append(f"{kind} badge shortened")
+            return badge
         
-        y = PADDING + 20
+        y = padding + 20
+        if logo and canvas.logo == 'top':
+            y += logo_size + 40
         
         # Package name
         package_name = package_data['name']
-        text_color = theme['primary']
-        draw.text((PADDING, y), package_name, 
-                 font=self.fonts['title'], fill=text_color)
-        y += self.fonts['title'].getbbox(package_name)[3] + 25
+        title_measurer = self._measurer(fonts['title'])
+        title_text = package_name
+        if shorten:
+            title_text = truncate_text(package_name, title_measurer, content_width)
+            if title_text != package_name:
+                truncated.append("title shortened")
+        title = title_measurer.line(title_text)
+        elements.append(TextOp((padding, y), title_text, font_keys['title'], 'primary'))
+        title_overflow = title.width - content_width
+        y += title.height + 25
         
         # Version badge
-        version = package_data.get('version', '')
-        if version:
-            version_text = f"v{version}"
-            version_width = draw.textlength(version_text, self.fonts['version']) + 16
-            version_height = 28
-            
-            self._draw_rounded_rect(draw, 
-                [PADDING, y, PADDING + version_width, y + version_height],
-                14, fill=theme['accent'])
-            
-            draw.text((PADDING + 8, y + 4), version_text, 
-                     font=self.fonts['version'], fill='white')
-            y += version_height + 30
+        if 'version' in self.badges:
+            badge = plan_badge('version', padding)
+            if badge:
+                elements.append(badge)
+                badge_overflow = max(badge_overflow, badge.bbox[2] - content_right)
+                y += BADGE_TYPES['version'].height + 30
         
         # Description
         summary = package_data.get('summary', '')
         if summary:
-            lines = self._wrap_text(summary, self.fonts['desc'], content_width, draw)
-            secondary_color = theme['secondary']
+            desc_measurer = self._measurer(fonts['desc'])
+            lines = layout_text(summary, desc_measurer, content_width, summary_lines)
+            if lines and lines[-1].text.endswith("\u2026"):
+                truncated.append(f"summary cut to {len(lines)} line{'s' if len(lines) != 1 else ''}")
             for line in lines:
-                draw.text((PADDING, y), line, 
-                         font=self.fonts['desc'], fill=secondary_color)
-                y += self.fonts['desc'].getbbox(line)[3] + 6
+                text = line.text
+                if shorten and line.width > content_width:
+                    text = truncate_text(text, desc_measurer, content_width)
+                    truncated.append("summary line shortened")
+                summary_overflow = max(summary_overflow, desc_measurer.length(text) - content_width)
+                elements.append(TextOp((padding, y), text, font_keys['desc'], 'secondary'))
+                y += line.height + 6
             y += 25
         
-        # Python requirement badge
-        requires_python = package_data.get('requires_python', '')
-        if requires_python:
-            req_text = f"Python {requires_python}+"
-            req_width = draw.textlength(req_text, self.fonts['badge']) + 12
-            req_height = 24
-            
-            badge_color = theme.get('border', theme['accent'])
-            self._draw_rounded_rect(draw,
-                [PADDING, y, PADDING + req_width, y + req_height],
-                4, fill=badge_color)
+        # Badge row: Python requirement, then any other enabled badge types
+        x, row_height = padding, 0
+        for kind in self.badges:
+            if kind == 'version':
+                continue
+            badge = self._plan_badge(kind, package_data, x, y)
+            if badge is None:
+                continue
+            if badge.bbox[2] > content_right:
+                if x > padding:
+                    # No room left on the row, but a later, shorter badge may still fit
+                    truncated.append(f"{kind} badge dropped")
+                    badge_overflow = max(badge_overflow, badge.bbox[2] - content_right)
+                    continue
+                badge = plan_badge(kind, x)
+            badge_overflow = max(badge_overflow, badge.bbox[2] - content_right)
+            elements.append(badge)
+            x = badge.bbox[2] + 9
+            row_height = max(row_height, BADGE_TYPES[kind].height)
+        if row_height:
+            y += row_height + 35
+        
+        # Installation command: terminal card, its border and the command
+        cmd_text = f"$ pip install {package_name}"
+        cmd_height = 50
+        cmd_padding = 20
+        cmd_measurer = self._measurer(fonts['cmd'])
+        cmd_width = content_width - 2 * cmd_padding
+        if shorten and cmd_measurer.length(cmd_text) > cmd_width:
+            cmd_text = truncate_text(cmd_text, cmd_measurer, cmd_width)
+            truncated.append("command shortened")
+        card_bbox = (padding, y, padding + content_width, y + cmd_height)
+        elements.append(RoundedRectOp(card_bbox, 8, 'card'))
+        elements.append(RoundedRectOp(card_bbox, 8, None, 'border', role='card_border'))
+        elements.append(TextOp((padding + cmd_padding, y + 12), cmd_text, font_keys['cmd'], 'primary'))
+        cmd_overflow = cmd_measurer.length(cmd_text) - cmd_width
+        bottom = y + cmd_height
+        y += cmd_height + 30
+        
+        # Project URL
+        project_url = package_data.get('project_url', '')
+        if project_url:
+            clean_url = project_url.replace('https://', '').replace('http://', '')
+            url_measurer = self._measurer(fonts['url'])
+            fitted_url = truncate_text(clean_url, url_measurer, canvas.width - 2 * padding)
+            if fitted_url != clean_url:
+                truncated.append("URL shortened")
+            elements.append(TextOp((padding, y), fitted_url, font_keys['url'], 'secondary'))
+            bottom = y + url_measurer.height(fitted_url)
+        
+        chrome = []
+        if logo:
+            logo_x = canvas.width - logo_size - padding
+            if canvas.logo == 'top':
+                logo_x = padding + 15  # line the plate up with the text
+            logo_y = padding + 20
             
-            draw.text((PADDING + 6, y + 3), req_text,
-                     font=self.fonts['badge'], fill='white')
-            y += req_height + 35
+            # Logo background
+            bg_padding = 15
+            chrome.append(RoundedRectOp(
+                (logo_x - bg_padding, logo_y - bg_padding,
+                 logo_x + logo_size + bg_padding, logo_y + logo_size + bg_padding),
+                8, 'card'))
+            chrome.append(PasteOp((logo_x, logo_y), (logo_size, logo_size), 'logo'))
+        
+        limit = canvas.height - padding // 2
+        if canvas.center and bottom < limit:
+            # Centre the content between the top padding and the bottom margin;
+            # the logo moves with it, so it is no longer static chrome
+            shift = (limit - bottom) // 2
+            elements = [_shift_element(element, shift) for element in elements + chrome]
+            chrome = []
+            bottom += shift
+        
+        # Accent line at top
+        chrome.append(RectOp((0, 0, canvas.width, 4), 'accent'))
+        
+        overflow = {
+            'height': bottom - limit,
+            'title': title_overflow,
+            'summary': summary_overflow,
+            'badges': badge_overflow,
+            'command': cmd_overflow,
+        }
+        fits = all(value <= 0 for value in overflow.values())
+        return LayoutPlan(elements, fits, overflow, truncated, chrome)
+    
+    def _plan_badge(self, kind, package_data, x, y, max_right=None):
+        """Plan one badge from BADGE_TYPES, or None if the package has no value for it
+        
+        With ``max_right`` the text is cut with an ellipsis so that the
+        badge ends there at the latest.
+        """
+        badge = BADGE_TYPES[kind]
+        text = badge.text(package_data)
+        if not text:
+            return None
+        font = self.fonts.roles[badge.role]
+        measurer = self._measurer(self.font_manager.get(*font))
+        if max_right is not None:
+            # Half a pixel of slack for the rounding of the width below
+            text = truncate_text(text, measurer, max_right - x - 2 * badge.padding[0] - 0.5)
+        width = round(measurer.length(text)) + 2 * badge.padding[0]
+        return BadgeOp((x, y, x + width, y + badge.height), text, font,
+                       badge.fg, badge.bg, badge.radius, badge.padding)
+    
+    def _fit_layout(self, package_data, logo, canvas=DEFAULT_CANVAS):
+        """Binary-search FIT_LADDER for the roomiest step that fits the canvas
+        
+        Returns ``(plan, adjustments)`` where ``adjustments`` describes every
+        change made relative to the preferred layout.
+        """
+        # The title and the install command only need to fit horizontally, so
+        # their sizes are capped on their own before the vertical search
+        content_width = self._content_width(logo, canvas)
+        title_cap = self._largest_fitting_size(
+            'title', package_data['name'], content_width, [step[0] for step in FIT_LADDER])
+        cmd_cap = self._largest_fitting_size(
+            'cmd', f"$ pip install {package_data['name']}", content_width - 2 * 20,  # card padding
+            [step[2] for step in FIT_LADDER])
+        
+        def fit(step):
+            title_size, desc_size, cmd_size, summary_lines = FIT_LADDER[step]
+            return min(title_size, title_cap), desc_size, min(cmd_size, cmd_cap), summary_lines
+        
+        plans = {}
+        
+        def plan(step):
+            if step not in plans:
+                plans[step] = self._plan_layout(package_data, fit(step), logo, canvas)
+            return plans[step]
+        
+        def fits_height(step):
+            return plan(step).overflow['height'] <= 0
+        
+        low, high = 0, len(FIT_LADDER) - 1
+        if fits_height(0):
+            high = 0
+        while low < high:
+            mid = (low + high) // 2
+            if fits_height(mid):
+                high = mid
+            else:
+                low = mid + 1
+        
+        chosen = plan(low)
+        if not chosen.fits:
+            chosen = self._plan_layout(package_data, fit(low), logo, canvas, shorten=True)
+        
+        adjustments = []
+        preferred, fitted = FIT_LADDER[0], fit(low)
+        for name, before, after in zip(('title', 'summary', 'command'), preferred, fitted):
+            if before != after:
+                adjustments.append(f"{name} {before}→{after}px")
+        adjustments.extend(chosen.truncated)
+        if chosen.overflow['height'] > 0:
+            adjustments.append(f"still {chosen.overflow['height']}px too tall")
+        return chosen, adjustments
+    
+    def _content_width(self, logo, canvas=DEFAULT_CANVAS):
+        """Width available to text, leaving space for the logo if there is one"""
+        logo_space = 140 if logo and canvas.logo == 'right' else 0
+        return canvas.width - 2 * canvas.padding - logo_space
+    
+    def _largest_fitting_size(self, role, text, max_width, sizes):
+        """Binary-search descending ``sizes`` for the largest one that fits"""
+        face = self.fonts.roles[role][0]
+        
+        def fits(size):
+            return self._measurer(self.font_manager.get(face, size)).length(text) <= max_width
+        
+        low, high = 0, len(sizes) - 1
+        while low < high:
+            mid = (low + high) // 2
+            if fits(sizes[mid]):
+                high = mid
+            else:
+                low = mid + 1
+        return sizes[low]
+    
+    def fit_report(self, package_data, canvas=DEFAULT_CANVAS):
+        """List the auto-fit adjustments a package needs
+        
+        This reads the cached display list, so reporting before a render
+        doesn't plan the layout a second time.
+        """
+        return self.display_list(package_data, canvas).adjustments
+    
+    def print_fit_report(self, package_data, indent=""):
+        """Tell the user when a package needed auto-fit adjustments"""
+        for name in self.templates:
+            try:
+                adjustments = self.fit_report(package_data, LAYOUT_TEMPLATES[name].canvas)
+            except FontLoadError:
+                return  # reported by the render itself
+            if adjustments:
+                label = "" if self.templates == (DEFAULT_TEMPLATE,) else f" ({name})"
+                print(f"{indent}📐 Auto-fit{label}: {', '.join(adjustments)}")
+    
+    def prepare_layout(self, package_data, canvas=DEFAULT_CANVAS, scale=1):
+        """Measure and rasterize everything that does not depend on the theme
+        
+        Font sizes and summary length are reduced as needed (see FIT_LADDER)
+        so that every block stays inside the canvas; the changes made are
+        listed in the layout's ``adjustments``. The layout is planned in
+        canvas units and rasterized at ``scale`` (fonts, logo and geometry
+        are scaled, so a 2x layout is sharp rather than upsampled).
+        """
+        return self.rasterize(self.display_list(package_data, canvas), scale)
+    
+    def display_list(self, package_data, canvas=DEFAULT_CANVAS):
+        """Lay out a banner as a theme-independent DisplayList
+        
+        This is the layout tier: the auto-fit search and all text
+        measurement happen here, once per package and canvas (recent
+        results are kept), and every scale and theme is produced from it.
+        """
+        key = json.dumps([package_data, canvas], sort_keys=True, default=str)
+        display_list = self._display_lists.pop(key, None)
+        if display_list is None:
+            plan, adjustments = self._fit_layout(package_data, self._logo_asset(), canvas)
+            display_list = DisplayList(canvas.width, canvas.height,
+                                       [BackgroundOp()] + plan.chrome + plan.elements,
+                                       1 + len(plan.chrome), adjustments)
+        self._display_lists[key] = display_list
+        while len(self._display_lists) > 8 * len(self.templates):
+            self._display_lists.popitem(last=False)
+        return display_list
+    
+    def rasterize(self, display_list, scale=1):
+        """Rasterize a display list's text, shapes and images at ``scale``
+        
+        Returns a BannerLayout for ``compose``, which draws the theme
+        background where the display list has its BackgroundOp.
+        """
+        width, height = scaled_size(display_list, scale)
+        static = self._raster_elements(display_list.ops[:display_list.static], scale)
+        elements = self._raster_elements(display_list.ops[display_list.static:], scale)
+        return BannerLayout(width, height, elements, display_list.adjustments, scale, static)
+    
+    def render_display_list(self, display_list, theme, scale=1):
+        """Raster backend: render a display list in ``theme`` at ``scale``"""
+        return self.compose(self.rasterize(display_list, scale), theme)
+    
+    def render_svg(self, display_list, theme, scale=1, fonts='embed', optimize=False):
+        """Vector backend: render a display list in ``theme`` as an SVG document
+        
+        Positions, font sizes and baselines (top + ascent) are rounded like
+        the raster backend's, so text lands where ``render_display_list``
+        draws it. ``fonts`` is 'embed' (subset when fontTools is installed,
+        whole fonts otherwise) or 'none' to rely on installed DejaVu fonts;
+        ``optimize`` spends more time shrinking the embedded logo.
+        """
+        if fonts not in ('embed', 'none'):
+            raise ValueError(f"Unknown SVG font mode '{fonts}'")
+        theme = Theme.coerce(theme)
+        
+        def px(value):
+            return round(value * scale)
+        
+        width, height = scaled_size(display_list, scale)
+        line_width = max(1, round(scale))
+        defs = []
+        body = []
+        chars = {}  # face -> characters drawn in it
+        
+        def text(face, size, x, top, run, color):
+            font = self.font_manager.get(face, size)
+            chars.setdefault(face, set()).update(run)
+            # textLength pins the run to the raster advance width, whatever the viewer's hinting
+            body.append(f'<text x="{x}" y="{top + font.getmetrics()[0]}" class="f-{face}" '
+                        f'font-size="{size}" textLength="{_svg_number(font.getlength(run))}" '
+                        f'fill="{_svg_color(color)}">{_svg_text(run)}</text>')
+        
+        for op in display_list.ops:
+            if isinstance(op, BackgroundOp):
+                for shape in background_ops(theme, width, height, scale):
+                    body.append(self._svg_shape(shape, defs))
+            elif isinstance(op, TextOp):
+                face, size = op.font
+                if op.text:
+                    text(face, px(size), px(op.position[0]), px(op.position[1]), op.text,
+                         _theme_color(theme, op.color))
+            elif isinstance(op, RectOp):
+                body.append(self._svg_shape(op._replace(bbox=tuple(px(v) for v in op.bbox),
+                                                        fill=_theme_color(theme, op.fill)), defs))
+            elif isinstance(op, RoundedRectOp):
+                # Gradient cards read better without a border
+                if op.role == 'card_border' and theme['type'] in GRADIENT_THEME_TYPES:
+                    continue
+                x1, y1, x2, y2 = (px(v) for v in op.bbox)
+                radius = px(op.radius)
+                if op.fill:
+                    body.append(f'<rect x="{x1}" y="{y1}" width="{x2 - x1 + 1}" height="{y2 - y1 + 1}" '
+                                f'rx="{radius}" fill="{_svg_color(_theme_color(theme, op.fill))}"/>')
+                if op.outline:
+                    # Strokes straddle the path; inset by half so the ring stays inside the box
+                    inset = line_width / 2
+                    body.append(f'<rect x="{_svg_number(x1 + inset)}" y="{_svg_number(y1 + inset)}" '
+                                f'width="{x2 - x1 + 1 - line_width}" height="{y2 - y1 + 1 - line_width}" '
+                                f'rx="{_svg_number(max(radius - inset, 0))}" fill="none" '
+                                f'stroke="{_svg_color(_theme_color(theme, op.outline))}" '
+                                f'stroke-width="{line_width}"/>')
+            elif isinstance(op, BadgeOp):
+                x1, y1, x2, y2 = (px(v) for v in op.bbox)
+                body.append(f'<rect x="{x1}" y="{y1}" width="{x2 - x1 + 1}" height="{y2 - y1 + 1}" '
+                            f'rx="{px(op.radius)}" fill="{_svg_color(_theme_color(theme, op.bg))}"/>')
+                face, size = op.font
+                text(face, px(size), x1 + px(op.text_offset[0]), y1 + px(op.text_offset[1]), op.text,
+                     _theme_color(theme, op.fg))
+            elif isinstance(op, PasteOp):
+                if op.asset != 'logo':
+                    raise ValueError(f"Unknown display list asset '{op.asset}'")
+                asset = self._logo_asset(px(op.size[0]))
+                if asset is not None:
+                    body.append(f'<image x="{px(op.position[0])}" y="{px(op.position[1])}" '
+                                f'width="{asset.image.width}" height="{asset.image.height}" '
+                                f'xlink:href="{SVG_ASSETS.image(asset.image, optimize)}"/>')
+            elif isinstance(op, (GradientOp, EllipseOp, LineOp)):
+                body.append(self._svg_shape(_scale_op(op, scale), defs))
+            else:
+                raise ValueError(f"Unknown display list op {op!r}")
+        
+        styles = ['text{white-space:pre}']
+        for face, used in chars.items():
+            family, style = self.font_manager.get(face, 12).getname()
+            weight = 'bold' if 'Bold' in style else 'normal'
+            if fonts == 'embed':
+                uri = SVG_ASSETS.font(self.font_manager, face, used)
+                styles.append(f'@font-face{{font-family:"banner-{face}";font-weight:{weight};src:url({uri})}}')
+            styles.append(f'.f-{face}{{font-family:"banner-{face}","{family}",sans-serif;font-weight:{weight}}}')
+        
+        return ''.join([
+            f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+            f'width="{width}" height="{height}" viewBox="0 0 {width} {height}" xml:space="preserve">',
+            f'<defs><style>{"".join(styles)}</style>{"".join(defs)}</defs>',
+            '\n'.join(body),
+            '</svg>\n',
+        ])
+    
+    def _svg_shape(self, op, defs):
+        """SVG markup for a pixel-unit rect, gradient, ellipse or line op with a resolved colour"""
+        if isinstance(op, RectOp):
+            x1, y1, x2, y2 = op.bbox
+            return f'<rect x="{x1}" y="{y1}" width="{x2 - x1 + 1}" height="{y2 - y1 + 1}" fill="{_svg_color(op.fill)}"/>'
+        if isinstance(op, GradientOp):
+            x1, y1, x2, y2 = op.bbox
+            width, height = x2 - x1 + 1, y2 - y1 + 1
+            radians = math.radians(op.angle % 360)
+            dx, dy = math.cos(radians), math.sin(radians)
+            half = (abs(width * dx) + abs(height * dy)) / 2
+            cx, cy = x1 + width / 2, y1 + height / 2
+            gradient_id = f"g{len(defs)}"
+            stops = ''.join(f'<stop offset="{_svg_number(position)}" stop-color="{_svg_color(color)}"/>'
+                            for position, color in _normalize_stops(op.stops))
+            defs.append(f'<linearGradient id="{gradient_id}" gradientUnits="userSpaceOnUse" '
+                        f'x1="{_svg_number(cx - dx * half)}" y1="{_svg_number(cy - dy * half)}" '
+                        f'x2="{_svg_number(cx + dx * half)}" y2="{_svg_number(cy + dy * half)}">'
+                        f'{stops}</linearGradient>')
+            return f'<rect x="{x1}" y="{y1}" width="{width}" height="{height}" fill="url(#{gradient_id})"/>'
+        if isinstance(op, EllipseOp):
+            x1, y1, x2, y2 = op.bbox
+            opacity = op.fill[3] / 255 if len(op.fill) == 4 else 1
+            return (f'<ellipse cx="{_svg_number((x1 + x2 + 1) / 2)}" cy="{_svg_number((y1 + y2 + 1) / 2)}" '
+                    f'rx="{_svg_number((x2 - x1 + 1) / 2)}" ry="{_svg_number((y2 - y1 + 1) / 2)}" '
+                    f'fill="{_svg_color(op.fill)}" fill-opacity="{_svg_number(opacity)}"/>')
+        # Lines cover whole pixels in the raster backend; centre them on the pixel
+        points = ' '.join(f"{_svg_number(x + 0.5)},{_svg_number(y + 0.5)}" for x, y in op.points)
+        return (f'<polyline points="{points}" fill="none" stroke="{_svg_color(op.fill)}" '
+                f'stroke-width="{op.width}" shape-rendering="crispEdges"/>')
+    
+    def _raster_elements(self, ops, scale):
+        """Turn display list ops into layout elements at ``scale``"""
+        def px(value):
+            return round(value * scale)
+        
+        elements = []
+        for op in ops:
+            if isinstance(op, BackgroundOp):
+                continue
+            elif isinstance(op, TextOp):
+                face, size = op.font
+                element = self._text_element((px(op.position[0]), px(op.position[1])),
+                                             op.text, self.font_manager.get(face, px(size)), op.color)
+                if element is None:
+                    continue
+            elif isinstance(op, RectOp):
+                element = LayoutBox([px(v) for v in op.bbox], 0, op.fill)
+            elif isinstance(op, RoundedRectOp):
+                element = LayoutBox([px(v) for v in op.bbox], px(op.radius), op.fill, op.outline, op.role)
+            elif isinstance(op, BadgeOp):
+                face, size = op.font
+                element = LayoutBadge([px(v) for v in op.bbox], op.text, (face, px(size)),
+                                      op.fg, op.bg, px(op.radius), tuple(px(v) for v in op.text_offset))
+            elif isinstance(op, PasteOp):
+                if op.asset != 'logo':
+                    raise ValueError(f"Unknown display list asset '{op.asset}'")
+                asset = self._logo_asset(px(op.size[0]))
+                if asset is None:
+                    continue
+                element = LayoutImage((px(op.position[0]), px(op.position[1])), asset)
+            elif isinstance(op, (GradientOp, EllipseOp, LineOp)):
+                element = _scale_op(op, scale)
+            else:
+                raise ValueError(f"Unknown display list op {op!r}")
+            elements.append(element)
+        return elements
+    
+    def compose(self, layout, theme):
+        """Colourise a prepared layout onto a copy of the theme's chrome
         
-        # Installation command
-        cmd_text = f"pip install {package_name}"
-        cmd_height = 50
-        cmd_padding = 20
+        In palette mode, flat themes are instead recoloured from an indexed
+        render of the layout and come back as 'P' images.
+        """
+        theme = Theme.coerce(theme)
+        if self.palette and theme['type'] in PALETTE_THEME_TYPES:
+            indexed = self._indexed_layout(layout, theme)
+            if indexed is not None:
+                return indexed.render(theme)
         
-        # Terminal card
-        card_color = theme['card']
-        self._draw_rounded_rect(draw,
-            [PADDING, y, PADDING + content_width, y + cmd_height],
-            8, fill=card_color)
-        
-        # Add border for better visibility
-        if theme['type'] not in ['gradient', 'synthwave']:
-            border_color = theme['border']
-            self._draw_rounded_rect(draw,
-                [PADDING, y, PADDING + content_width, y + cmd_height],
-                8, fill=None, outline=border_color)
-        
-        draw.text((PADDING + cmd_padding, y + 12), f"$ {cmd_text}",
-                 font=self.fonts['cmd'], fill=text_color)
-        y += cmd_height + 30
+        img = self._chrome(theme, layout).copy()
+        self._draw_elements(img, layout.elements, theme, layout.scale)
+        return img
+    
+    def _chrome(self, theme, layout):
+        """Return the background with the layout's static chrome drawn on it
         
-        # Project URL
-        project_url = package_data.get('project_url', '')
-        if project_url:
-            clean_url = project_url.replace('https://', '').replace('http://', '')
-            secondary_color = theme['secondary']
-            draw.text((PADDING, y), clean_url,
-                     font=self.fonts['url'], fill=secondary_color)
+        Built once per theme, size and chrome, so every banner after the
+        first starts from a ``copy()`` instead of redrawing the background
+        (gradients, glass and neon grids are the expensive part).
+        """
+        key = (theme.signature, layout.width, layout.height, layout.scale,
+               tuple(_chrome_signature(element) for element in layout.chrome))
+        entry = self._chromes.pop(key, None)
+        if entry is None:
+            img = self._create_background(theme, layout.width, layout.height, layout.scale)
+            self._draw_elements(img, layout.chrome, theme, layout.scale)
+            # Keep the chrome alive with the image so id()-based keys stay unique
+            entry = (img, layout.chrome)
+        self._chromes[key] = entry
+        while len(self._chromes) > 16:
+            self._chromes.popitem(last=False)
+        return entry[0]
+    
+    def _indexed_layout(self, layout, theme):
+        """Return the IndexedBanner of a layout, or None if it has too many colours
         
-        # Logo (auto-include if exists, no asking)
-        if os.path.exists(LOGO_PATH):
+        Kept per layout and per set of theme keys (which decides how each
+        colour resolves to a slot), so every flat theme shares one render.
+        """
+        key = (id(layout), tuple(sorted(theme)))
+        entry = self._indexed.pop(key, None)
+        if entry is None:
             try:
-                logo = Image.open(LOGO_PATH).convert("RGBA")
-                logo_size = 100
-                logo = logo.resize((logo_size, logo_size), Image.LANCZOS)
-                
-                logo_x = IMG_WIDTH - logo_size - PADDING
-                logo_y = PADDING + 20
-                
-                # Logo background
-                bg_padding = 15
-                logo_bg_color = theme['card']
-                self._draw_rounded_rect(draw,
-                    [logo_x - bg_padding, logo_y - bg_padding,
-                     logo_x + logo_size + bg_padding, logo_y + logo_size + bg_padding],
-                    8, fill=logo_bg_color)
-                
-                img.paste(logo, (logo_x, logo_y), logo)
-            except Exception as e:
-                print(f"Logo error: {e}")
+                indexed = self._index_elements(layout, theme)
+            except PaletteFull:
+                indexed = None
+            entry = (indexed, layout)
+        self._indexed[key] = entry
+        while len(self._indexed) > 16:
+            self._indexed.popitem(last=False)
+        return entry[0]
+    
+    def _index_elements(self, layout, theme):
+        """Rasterize a layout's chrome and elements into an IndexedBanner"""
+        def slot(color):
+            candidates = color if isinstance(color, tuple) else (color,)
+            return next((name for name in candidates if name in theme), candidates[-1])
         
-        # Accent line at top
-        draw.rectangle([0, 0, IMG_WIDTH, 4], fill=theme['accent'])
+        indexed = IndexedBanner(layout.width, layout.height, 'bg')
+        line_width = max(1, round(layout.scale))
         
-        return img
+        for element in layout.chrome + layout.elements:
+            if isinstance(element, LayoutText):
+                indexed.fill(slot(element.color), element.mask, element.position)
+            elif isinstance(element, LayoutBox):
+                x1, y1, x2, y2 = element.bbox
+                size = (x2 - x1 + 1, y2 - y1 + 1)
+                if element.fill:
+                    if element.radius <= 0:
+                        mask = Image.new('L', size, 255)
+                    else:
+                        mask = SHAPE_CACHE.rounded_rect(size[0], size[1], element.radius)
+                    indexed.fill(slot(element.fill), mask, (x1, y1))
+                if element.outline:
+                    mask = SHAPE_CACHE.rounded_rect(size[0], size[1], element.radius, line_width)
+                    indexed.fill(slot(element.outline), mask, (x1, y1))
+            elif isinstance(element, LayoutBadge):
+                x1, y1, x2, y2 = element.bbox
+                size = (x2 - x1 + 1, y2 - y1 + 1)
+                text = Image.new('L', size, 0)
+                ImageDraw.Draw(text).text(element.text_offset, element.text,
+                                          font=self.font_manager.get(*element.font), fill=255)
+                indexed.fill(slot(element.bg), SHAPE_CACHE.rounded_rect(size[0], size[1], element.radius),
+                             (x1, y1))
+                indexed.fill(slot(element.fg), text, (x1, y1))
+            elif isinstance(element, LayoutImage):
+                indexed.add_image(element.position, element.asset)
+            else:
+                raise PaletteFull(f"cannot index {type(element).__name__}")
+        return indexed
+    
+    def _draw_elements(self, img, elements, theme, scale=1):
+        """Draw layout elements onto ``img`` in order"""
+        line_width = max(1, round(scale))
+        
+        for element in elements:
+            if isinstance(element, LayoutText):
+                img.paste(_theme_color(theme, element.color), element.position, element.mask)
+            elif isinstance(element, LayoutBox):
+                # Gradient cards read better without a border
+                if element.role == 'card_border' and theme['type'] in GRADIENT_THEME_TYPES:
+                    continue
+                self._draw_rounded_rect(img, element.bbox, element.radius,
+                                        fill=_theme_color(theme, element.fill),
+                                        outline=_theme_color(theme, element.outline),
+                                        width=line_width)
+            elif isinstance(element, LayoutBadge):
+                x1, y1, x2, y2 = element.bbox
+                sprite = BADGE_CACHE.sprite(element.text, self.font_manager.get(*element.font),
+                                            _theme_color(theme, element.fg),
+                                            _theme_color(theme, element.bg),
+                                            element.radius, (x2 - x1 + 1, y2 - y1 + 1),
+                                            element.text_offset)
+                img.paste(sprite, (x1, y1), sprite)
+            elif isinstance(element, LayoutImage):
+                img.paste(element.asset.image, element.position, element.asset.mask)
+            elif isinstance(element, GradientOp):
+                x1, y1, x2, y2 = element.bbox
+                img.paste(create_gradient(x2 - x1 + 1, y2 - y1 + 1, element.stops, element.angle), (x1, y1))
+            elif isinstance(element, EllipseOp):
+                self._draw_ellipse(img, element.bbox, element.fill)
+            elif isinstance(element, LineOp):
+                ImageDraw.Draw(img).line(element.points, fill=element.fill, width=element.width)
+    
+    def _draw_ellipse(self, img, bbox, fill):
+        """Composite a (possibly translucent) ellipse through a tile cropped to its bounds"""
+        x1, y1, x2, y2 = bbox
+        left, top = max(x1, 0), max(y1, 0)
+        right, bottom = min(x2 + 1, img.width), min(y2 + 1, img.height)
+        if left >= right or top >= bottom:
+            return
+        
+        tile = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+        ImageDraw.Draw(tile).ellipse([x1 - left, y1 - top, x2 - left, y2 - top], fill=fill)
+        region = img.crop((left, top, right, bottom)).convert('RGBA')
+        region.alpha_composite(tile)
+        img.paste(region.convert(img.mode), (left, top))
+    
+    def _layout_for(self, package_data, canvas=DEFAULT_CANVAS, scale=1):
+        """Return the layout for a package, reusing recent ones"""
+        key = json.dumps([package_data, canvas, scale], sort_keys=True, default=str)
+        layout = self._layouts.pop(key, None)
+        if layout is None:
+            layout = self.prepare_layout(package_data, canvas, scale)
+        self._layouts[key] = layout
+        while len(self._layouts) > 8 * len(self.templates):
+            del self._layouts[next(iter(self._layouts))]
+        return layout
+    
+    def generate_banner(self, package_data, theme, canvas=DEFAULT_CANVAS, scale=1):
+        """Generate banner with specified theme"""
+        return self.compose(self.prepare_layout(package_data, canvas, scale), theme)
+    
+    def generate_svg(self, package_data, theme, canvas=DEFAULT_CANVAS, scale=1):
+        """Generate a banner as an SVG document (see ``render_svg``)"""
+        options = self.encoder.options if self.vector else {}
+        return self.render_svg(self.display_list(package_data, canvas), theme, scale, **options)
+    
+    @property
+    def vector(self):
+        """Whether banners are written as SVG documents"""
+        return self.encoder.format == 'svg'
+    
+    def render_scales(self, package_data, theme, scales=None, canvas=DEFAULT_CANVAS):
+        """Render a banner at several scales from a single render
+        
+        The banner is composed once at the largest scale (at least 1x, since
+        text rasterized directly at thumbnail sizes is poor) and the others
+        are downsampled from it (see ``derive_scales``). Returns
+        ``[(scale, image)]`` in the order of ``scales`` (the generator's
+        scales by default).
+        """
+        scales = tuple(scales or self.scales)
+        top = max(max(scales), 1)
+        img = self.compose(self._layout_for(package_data, canvas, top), theme)
+        return derive_scales(img, top, scales, canvas)
     
     def show_welcome(self):
         """Show enhanced welcome message"""
@@ -428,8 +2772,8 @@ class UltimateBannerGenerator:
         print("   • No Preview Images (Cleaner output)")
         print()
     
-    def get_package_name(self):
-        """Get package name from user"""
+    def select_package(self):
+        """Ask the user for a package and return its validated package data"""
         print("📦 PACKAGE SELECTION")
         print("-" * 20)
         
@@ -440,31 +2784,29 @@ class UltimateBannerGenerator:
                 print("❌ Package name cannot be empty. Please try again.")
                 continue
             
-            # Validate package exists on PyPI
+            # Validate package exists on PyPI (the result is reused for generation)
             print(f"🔍 Checking '{package_name}' on PyPI...")
             
             try:
-                response = requests.get(f"https://pypi.org/pypi/{package_name}/json", timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
-                    info = data['info']
-                    print(f"✅ Found: {info.get('name', package_name)}")
-                    print(f"   Version: {info.get('version', 'N/A')}")
-                    print(f"   Summary: {info.get('summary', 'No description')[:60]}...")
-                    print()
-                    
-                    confirm = input("📋 Use this package? (y/n): ").strip().lower()
-                    if confirm in ['y', 'yes', '']:
-                        return package_name
-                    else:
-                        continue
+                package_data = self.lookup_package(package_name)
+                print(f"✅ Found: {package_data['name']}")
+                print(f"   Version: {package_data.get('version') or 'N/A'}")
+                print(f"   Summary: {(package_data.get('summary') or 'No description')[:60]}...")
+                print()
+                
+                confirm = input("📋 Use this package? (y/n): ").strip().lower()
+                if confirm in ['y', 'yes', '']:
+                    return package_data
                 else:
-                    print(f"❌ Package '{package_name}' not found on PyPI.")
-                    retry = input("🔄 Try another name? (y/n): ").strip().lower()
-                    if retry not in ['y', 'yes', '']:
-                        return None
                     continue
                     
+            except PackageNotFoundError:
+                print(f"❌ Package '{package_name}' not found on PyPI.")
+                retry = input("🔄 Try another name? (y/n): ").strip().lower()
+                if retry not in ['y', 'yes', '']:
+                    return None
+                continue
+                
             except requests.RequestException:
                 print("❌ Error connecting to PyPI. Check your internet connection.")
                 retry = input("🔄 Try again? (y/n): ").strip().lower()
@@ -472,6 +2814,11 @@ class UltimateBannerGenerator:
                     return None
                 continue
     
+    def get_package_name(self):
+        """Get package name from user"""
+        package_data = self.select_package()
+        return package_data['name'] if package_data else None
+    
     def get_theme_choice(self):
         """Get theme selection from user with multiple options"""
         print("\n🎨 GENERATION OPTIONS")
@@ -480,7 +2827,7 @@ class UltimateBannerGenerator:
         print("Choose generation mode:")
         print("A. Single Theme - Generate one specific theme")
         print("B. Multiple Themes - Choose several themes")
-        print("C. All Themes - Generate all 12 themes at once")
+        print(f"C. All Themes - Generate all {len(ALL_THEMES)} themes at once")
         print("D. Category - Generate all themes from a category")
         print()
         
@@ -505,30 +2852,23 @@ class UltimateBannerGenerator:
         print()
         
         # Group themes by category
-        categories = {
-            'Professional': ['1', '2', '5', '7'],
-            'Minimal': ['3', '4', '6'],
-            'Gradient': ['8', '10', '12'],
-            'Modern': ['9', '11']
-        }
-        
-        for category, theme_keys in categories.items():
-            print(f"📂 {category}:")
+        for label, _, theme_keys in ALL_THEMES.categories():
+            print(f"📂 {label}:")
             for key in theme_keys:
                 theme = ALL_THEMES[key]
-                print(f"   {key}. {theme['name'].replace('_', ' ').title()}")
-                print(f"      {theme['description']}")
+                print(f"   {key}. {theme.title}")
+                if theme.get('description'):
+                    print(f"      {theme['description']}")
             print()
         
         while True:
-            choice = input("Select theme (1-12): ")
+            choice = input(f"Select theme ({ALL_THEMES.describe_keys()}): ").strip()
 
             if choice in ALL_THEMES:
-                selected_theme = ALL_THEMES[choice]
-                print(f"✅ Selected: {selected_theme['name'].replace('_', ' ').title()}")
+                print(f"✅ Selected: {ALL_THEMES[choice].title}")
                 return [choice]
             else:
-                print("❌ Invalid choice. Please select 1-12.")
+                print(f"❌ Invalid choice. Please select {ALL_THEMES.describe_keys()}.")
     
     def _get_multiple_themes(self):
         """Get multiple theme selection"""
@@ -538,7 +2878,7 @@ class UltimateBannerGenerator:
         
         # Show all themes with numbers
         for key, theme in ALL_THEMES.items():
-            print(f"{key}. {theme['name'].replace('_', ' ').title()}")
+            print(f"{key}. {theme.title}")
         
         print()
         print("Enter theme numbers separated by commas (e.g., 1,3,5)")
@@ -566,13 +2906,12 @@ class UltimateBannerGenerator:
                             selected_keys.append(part)
                 
                 if selected_keys:
-                    selected_keys = list(set(selected_keys))  # Remove duplicates
-                    selected_keys.sort(key=int)  # Sort numerically
+                    # Remove duplicates, in menu order
+                    selected_keys = [key for key in ALL_THEMES if key in selected_keys]
                     
                     print(f"\n✅ Selected {len(selected_keys)} themes:")
                     for key in selected_keys:
-                        theme = ALL_THEMES[key]
-                        print(f"   • {theme['name'].replace('_', ' ').title()}")
+                        print(f"   • {ALL_THEMES[key].title}")
                     
                     return selected_keys
                 else:
@@ -587,131 +2926,358 @@ class UltimateBannerGenerator:
         print("-" * 19)
         print()
         
-        categories = {
-            '1': {
-                'name': 'Professional',
-                'themes': ['1', '2', '5', '7'],
-                'description': 'Corporate and business styles'
-            },
-            '2': {
-                'name': 'Minimal',
-                'themes': ['3', '4', '6'],
-                'description': 'Clean and simple designs'
-            },
-            '3': {
-                'name': 'Gradient',
-                'themes': ['8', '10', '12'],
-                'description': 'Colorful gradient backgrounds'
-            },
-            '4': {
-                'name': 'Modern',
-                'themes': ['9', '11'],
-                'description': 'Trendy and experimental styles'
-            }
-        }
+        categories = {str(i): category for i, category in enumerate(ALL_THEMES.categories(), 1)}
         
-        for key, category in categories.items():
-            print(f"{key}. {category['name']} ({len(category['themes'])} themes)")
-            print(f"   {category['description']}")
+        for key, (label, description, theme_keys) in categories.items():
+            print(f"{key}. {label} ({len(theme_keys)} themes)")
+            print(f"   {description}")
             print()
         
         while True:
-            choice = input("Select category (1-4): ").strip()
+            choice = input(f"Select category (1-{len(categories)}): ").strip()
             
             if choice in categories:
-                selected_category = categories[choice]
-                print(f"✅ Selected: {selected_category['name']} category")
-                print(f"   Themes: {', '.join(selected_category['themes'])}")
-                return selected_category['themes']
+                label, _, theme_keys = categories[choice]
+                print(f"✅ Selected: {label} category")
+                print(f"   Themes: {', '.join(theme_keys)}")
+                return theme_keys
             else:
-                print("❌ Invalid choice. Please select 1-4.")
+                print(f"❌ Invalid choice. Please select 1-{len(categories)}.")
+    
+    def lookup_package(self, package_name):
+        """Validate a package and return its normalized package data
+        
+        This is the single lookup shared by every entry point: the data it
+        returns is what gets rendered, so nothing is fetched twice. Raises
+        PackageNotFoundError or requests.RequestException.
+        """
+        return self.client.get_package_data(package_name)
     
     def fetch_package_data(self, package_name):
-        """Fetch package data from PyPI"""
+        """Fetch package data from PyPI (None on failure)"""
         try:
-            response = requests.get(f"https://pypi.org/pypi/{package_name}/json")
-            response.raise_for_status()
-            data = response.json()
-            return {
-                'name': package_name,
-                'version': data['info'].get('version', ''),
-                'summary': data['info'].get('summary', ''),
-                'requires_python': data['info'].get('requires_python', ''),
-                'project_url': data['info'].get('project_url', f"https://pypi.org/project/{package_name}/"),
-                'author': data['info'].get('author', '')
-            }
+            return self.lookup_package(package_name)
         except Exception as e:
             print(f"Error fetching package data: {e}")
             return None
     
-    def save_banner(self, img, package_name, theme):
-        """Save banner without preview generation"""
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
+    def _output_path(self, package_name, theme, render_key=None, scale=1, template=DEFAULT_TEMPLATE,
+                     timestamp=None):
+        """Build the output file path for a banner
+        
+        Pass the same ``timestamp`` for every scale and template of one
+        banner so their names pair up (``name.png``/``name@2x.png``).
+        """
+        name = theme['name'] if template == DEFAULT_TEMPLATE else f"{theme['name']}_{template}"
+        if self.hash_names and render_key:
+            stem = f"{package_name}_{name}_{render_key[:16]}"
+        else:
+            timestamp = timestamp or _output_timestamp()
+            stem = f"{package_name}_{name}_{timestamp}"
+        return os.path.join(self.output_dir, stem + scale_suffix(scale) + self.encoder.extension)
+    
+    def render_buffer(self, package_data, theme, template=DEFAULT_TEMPLATE, scale=1):
+        """Render and encode a banner in memory, returning a memoryview
+        
+        Nothing is written to disk: the view points into the encoder's
+        in-memory buffer, in the generator's output format.
+        """
+        canvas = LAYOUT_TEMPLATES[template].canvas
+        if self.vector:
+            return self.encoder.encode_view(self.generate_svg(package_data, theme, canvas, scale))[0]
+        img = self.generate_banner(package_data, theme, canvas, scale)
+        return self.encoder.encode_view(img)[0]
+    
+    def render_bytes(self, package_data, theme, template=DEFAULT_TEMPLATE, scale=1):
+        """Render and encode a banner in memory, returning ``bytes``"""
+        return self.render_buffer(package_data, theme, template, scale).tobytes()
+    
+    def save_banner(self, img, package_name, theme, render_key=None, scale=1, template=DEFAULT_TEMPLATE,
+                    timestamp=None):
+        """Encode a rendered banner into the output directory, returning its EncodeResult"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        return self.encoder.save(img, self._output_path(package_name, theme, render_key, scale, template,
+                                                        timestamp))
+    
+    @property
+    def render_scale(self):
+        """Scale layouts are rasterized at before smaller scales are derived"""
+        return max(max(self.scales), 1)
+    
+    def _layouts_for(self, package_data):
+        """Return ``{template: layout}`` for the generator's templates
+        
+        SVG output needs no rasterizing, so it gets the display lists.
+        """
+        if self.vector:
+            return {name: self.display_list(package_data, LAYOUT_TEMPLATES[name].canvas)
+                    for name in self.templates}
+        return {name: self._layout_for(package_data, LAYOUT_TEMPLATES[name].canvas, self.render_scale)
+                for name in self.templates}
+    
+    def _compose_variants(self, layouts, theme):
+        """Compose a theme onto every template layout and derive every scale
+        
+        Returns ``[(template, scale, image)]``: templates in the generator's
+        order, and the scales of each template in ``self.scales`` order.
+        """
+        if self.vector:
+            return [(name, scale, self.render_svg(layouts[name], theme, scale, **self.encoder.options))
+                    for name in self.templates for scale in self.scales]
+        
+        variants = []
+        for name in self.templates:
+            img = self.compose(layouts[name], theme)
+            for scale, variant in derive_scales(img, self.render_scale, self.scales,
+                                                LAYOUT_TEMPLATES[name].canvas):
+                variants.append((name, scale, variant))
+        return variants
+    
+    def _variant_paths(self, package_name, theme, render_key=None):
+        """Output paths of every template and scale, in ``_compose_variants`` order"""
+        timestamp = _output_timestamp()
+        return [self._output_path(package_name, theme, render_key, scale, name, timestamp)
+                for name in self.templates for scale in self.scales]
+    
+    def _encode_to_disk(self, variants, package_data, theme, render_key=None):
+        """Write every template and scale of a banner to the output directory
+        
+        Returns one EncodeResult per ``(template, scale, image)`` in ``variants``.
+        """
+        timestamp = _output_timestamp()
+        return [self.save_banner(img, package_data['name'], theme, render_key, scale, name, timestamp)
+                for name, scale, img in variants]
+    
+    def _render_themes(self, package_data, themes, keys, layouts=None):
+        """Render and save several themes of one package from shared layouts
+        
+        Returns ``([EncodeResult per file], None)`` or ``(None, error)`` per theme.
+        """
+        try:
+            layouts = layouts or self._layouts_for(package_data)
+        except Exception as e:
+            return [(None, e)] * len(themes)
+        
+        outcomes = []
+        for theme, key in zip(themes, keys):
+            try:
+                variants = self._compose_variants(layouts, theme)
+                outcomes.append((self._encode_to_disk(variants, package_data, theme, key), None))
+            except Exception as e:
+                outcomes.append((None, e))
+        return outcomes
+    
+    def _render_and_submit(self, package_data, theme, render_key=None):
+        """Render one theme and hand its files to the encoder pool
+        
+        Returns a future-like object whose result is a list of EncodeResults.
+        """
+        try:
+            variants = self._compose_variants(self._layouts_for(package_data), theme)
+            os.makedirs(self.output_dir, exist_ok=True)
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+            return _EncodeGroup([future])
+        timestamp = _output_timestamp()
+        return _EncodeGroup([
+            self.encoder.submit(img, self._output_path(package_data['name'], theme, render_key,
+                                                       scale, name, timestamp))
+            for name, scale, img in variants])
+    
+    def _find_cached_render(self, package_data, theme, key):
+        """Return the paths of an up-to-date render for ``key``, or None"""
+        if self.force:
+            return None
+        if self.render_cache is not None:
+            paths = self.render_cache.lookup(key)
+            if paths:
+                return paths
+        if self.hash_names:
+            paths = self._variant_paths(package_data['name'], theme, key)
+            if all(os.path.exists(path) for path in paths):
+                return paths
+        return None
+    
+    def _run_render_jobs(self, tasks, jobs=None):
+        """Render and save ``(package_data, theme)`` tasks
+        
+        Tasks whose content hash matches an existing render are skipped. The
+        rest run in a process pool of ``jobs`` workers (defaults to the
+        generator's ``jobs``); with a single job, encoding overlaps with
+        rendering the next banners on the encoder's thread pool. Yields a
+        RenderResult per task in task order; a failing task does not stop
+        the others.
+        """
+        encoding = (self.encoder.format, self.encoder.preset)
+        keys = [render_key(*task, encoding=encoding, scales=self.scales,
+                           templates=self.templates, badges=self.badges, palette=self.palette)
+                for task in tasks]
+        cached = [self._find_cached_render(*task, key) for task, key in zip(tasks, keys)]
+        pending = [i for i, path in enumerate(cached) if path is None]
+        jobs = max(1, min(jobs or self.jobs, len(pending)))
         
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"{package_name}_{theme['name']}_{timestamp}.png"
+        pool = None
+        futures = {}
+        if jobs > 1:
+            self.font_manager.preload()
+            pool = ProcessPoolExecutor(max_workers=jobs,
+                                       initializer=_init_render_worker,
+                                       initargs=(self,))
+            
+            # Group themes by package so each layout is computed once. With
+            # fewer packages than workers, lay out here and fan themes out.
+            groups = {}
+            for i in pending:
+                groups.setdefault(json.dumps(tasks[i][0], sort_keys=True, default=str), []).append(i)
+            
+            for indices in groups.values():
+                package_data = tasks[indices[0]][0]
+                chunks, layouts = [indices], None
+                if len(groups) < jobs:
+                    chunks = [[i] for i in indices]
+                    try:
+                        layouts = self._layouts_for(package_data)
+                    except Exception:
+                        layouts = None  # the workers report the error per theme
+                for chunk in chunks:
+                    future = pool.submit(_render_worker, package_data,
+                                         [tasks[i][1] for i in chunk], [keys[i] for i in chunk], layouts)
+                    for position, i in enumerate(chunk):
+                        futures[i] = _PooledOutcome(future, position)
         
-        # Main banner only
-        main_path = os.path.join(OUTPUT_DIR, filename)
-        img.save(main_path, quality=95, optimize=True)
+        # Serial mode renders up to `lookahead` banners ahead of the one being reported
+        lookahead = max(self.encoder.threads, 0)
+        submitted = 0
         
-        return main_path
+        try:
+            for i, task in enumerate(tasks):
+                if pool is None:
+                    while submitted < min(i + 1 + lookahead, len(tasks)):
+                        if cached[submitted] is None:
+                            futures[submitted] = self._render_and_submit(*tasks[submitted], keys[submitted])
+                        submitted += 1
+                
+                if cached[i]:
+                    yield RenderResult(task, cached[i][0], None, True, None, cached[i])
+                    continue
+                
+                try:
+                    encoded = futures.pop(i).result()
+                except Exception as e:
+                    yield RenderResult(task, None, e, False, None, pooled=pool is not None)
+                    continue
+                
+                paths = [result.path for result in encoded]
+                if self.render_cache is not None:
+                    self.render_cache.record(keys[i], paths)
+                yield RenderResult(task, paths[0], None, False, encoded[0], paths, pool is not None)
+        finally:
+            for future in futures.values():
+                future.cancel()
+            if pool is not None:
+                pool.shutdown()
+            if self.render_cache is not None:
+                self.render_cache.save()
+    
+    def render_to_file(self, package_data, theme):
+        """Render and save a single banner, reusing an unchanged earlier render"""
+        return list(self._run_render_jobs([(package_data, theme)], jobs=1))[0]
     
-    def generate_multiple_banners(self, package_data, selected_themes):
-        """Generate multiple banners at once"""
+    def generate_multiple_banners(self, package_data, selected_themes, jobs=None):
+        """Generate multiple banners at once
+        
+        Themes are rendered in parallel (see ``_run_render_jobs``) and
+        reported in selection order.
+        """
         generated_files = []
+        tasks = [(package_data, ALL_THEMES[key]) for key in selected_themes]
+        jobs = max(1, min(jobs or self.jobs, len(tasks)))
         
-        print(f"\n🚀 BATCH GENERATION")
+        print("\n🚀 BATCH GENERATION")
         print("-" * 19)
         print(f"📦 Package: {package_data['name']}")
         print(f"🎨 Themes: {len(selected_themes)} selected")
-        print(f"📏 Size: {IMG_WIDTH}x{IMG_HEIGHT}px")
+        print(f"📏 Size: {describe_sizes(self.scales, self.templates)}")
+        print(f"⚙️  Workers: {jobs}")
+        self.print_fit_report(package_data)
         print()
         
-        for i, theme_key in enumerate(selected_themes, 1):
-            theme = ALL_THEMES[theme_key]
-            print(f"🎨 [{i}/{len(selected_themes)}] Generating {theme['name'].replace('_', ' ').title()}...")
+        for i, result in enumerate(self._run_render_jobs(tasks, jobs), 1):
+            theme = result.task[1]
+            print(f"🎨 [{i}/{len(tasks)}] Generating {theme['name'].replace('_', ' ').title()}...")
             
-            try:
-                img = self.generate_banner(package_data, theme)
-                file_path = self.save_banner(img, package_data['name'], theme)
-                generated_files.append(file_path)
-                
-                file_size = os.path.getsize(file_path) / 1024
-                print(f"   ✅ Saved: {os.path.basename(file_path)} ({file_size:.1f} KB)")
-                
-            except Exception as e:
-                print(f"   ❌ Error: {e}")
+            if result.error is not None:
+                print(f"   ❌ Error: {result.error}")
                 continue
             
-            # Small delay for visual feedback
-            time.sleep(0.2)
+            generated_files.append(result.path)
+            print(f"   {_describe_result(result)}")
         
         return generated_files
     
+    def generate_batch(self, entries, default_themes, jobs=None):
+        """Generate banners for many packages in one process
+        
+        ``entries`` is a list of ``{'package': name, 'themes': [keys] or None}``
+        dicts (see ``read_batch_entries``). Fonts, the HTTP session and the
+        render pool are shared by every package.
+        """
+        print("\n🚀 MULTI-PACKAGE GENERATION")
+        print("-" * 27)
+        print(f"📦 Packages: {len(entries)}")
+        print()
+        
+        tasks = []
+        failed = []
+        lookups = self.client.fetch_many(entry['package'] for entry in entries)
+        for i, (entry, (package_name, package_data, error)) in enumerate(zip(entries, lookups), 1):
+            if error is not None:
+                print(f"📡 [{i}/{len(entries)}] ❌ {package_name}: {error}")
+                failed.append(package_name)
+                continue
+            print(f"📡 [{i}/{len(entries)}] ✅ {package_name} {package_data.get('version', '')}")
+            self.print_fit_report(package_data, indent="   ")
+            for key in entry.get('themes') or default_themes:
+                tasks.append((package_data, ALL_THEMES[key]))
+        
+        generated_files = []
+        if tasks:
+            print(f"\n🎨 Rendering {len(tasks)} banners...")
+        reused = 0
+        pooled = False
+        for result in self._run_render_jobs(tasks, jobs):
+            pooled = pooled or result.pooled
+            package_data, theme = result.task
+            label = f"{package_data['name']} / {theme['name'].replace('_', ' ').title()}"
+            if result.error is not None:
+                print(f"   ❌ {label}: {result.error}")
+                failed.append(label)
+                continue
+            generated_files.append(result.path)
+            reused += result.cached
+            print(f"   {label}: {_describe_result(result)}")
+        
+        print(f"\n✅ Generated {len(generated_files)} banners ({reused} unchanged), {len(failed)} failed")
+        atlas = GLYPH_ATLAS.stats()
+        if not pooled and atlas['hits'] + atlas['misses']:  # pool workers keep their own atlases
+            print(f"🔤 Glyph atlas: {atlas['hit_rate']:.1%} hits, {atlas['misses']} glyphs rasterized")
+        return generated_files, failed
+    
     def run(self):
         """Main interactive flow with enhanced options"""
         try:
             self.show_welcome()
             
-            # Get user inputs
-            package_name = self.get_package_name()
-            if not package_name:
+            # Get user inputs (package data comes back with the validation)
+            package_data = self.select_package()
+            if not package_data:
                 print("👋 Goodbye!")
                 return
+            package_name = package_data['name']
             
             selected_themes = self.get_theme_choice()
             
-            # Fetch package data
-            print(f"\n� FETCHING DATA")
-            print("-" * 15)
-            print("� Getting package information from PyPI...")
-            package_data = self.fetch_package_data(package_name)
-            if not package_data:
-                print("❌ Failed to fetch package data.")
-                return
-            print("✅ Package data retrieved successfully!")
-            
             # Generate banners
             if len(selected_themes) == 1:
                 # Single banner generation
@@ -720,19 +3286,22 @@ class UltimateBannerGenerator:
                 print(f"\n🚀 GENERATING BANNER")
                 print("-" * 19)
                 print(f"📦 Package: {package_name}")
-                print(f"🎨 Theme: {theme['name'].replace('_', ' ').title()}")
-                print(f"📏 Size: {IMG_WIDTH}x{IMG_HEIGHT}px")
+                print(f"🎨 Theme: {theme.title}")
+                print(f"📏 Size: {describe_sizes(self.scales, self.templates)}")
+                self.print_fit_report(package_data)
                 print()
                 
                 print("🎨 Creating banner...")
-                img = self.generate_banner(package_data, theme)
+                result = self.render_to_file(package_data, theme)
+                if result.error is not None:
+                    raise result.error
                 
-                print("💾 Saving file...")
-                output_path = self.save_banner(img, package_name, theme)
-                
-                file_size = os.path.getsize(output_path) / 1024
-                print(f"✅ Banner generated successfully!")
-                print(f"📁 File: {output_path} ({file_size:.1f} KB)")
+                if result.cached:
+                    print("♻️  Banner unchanged since the last run, reusing it.")
+                else:
+                    print(f"✅ Banner generated successfully!")
+                print(f"📁 File: {result.path}")
+                print(f"   {_describe_result(result)}")
                 
             else:
                 # Multiple banners generation
@@ -744,7 +3313,7 @@ class UltimateBannerGenerator:
                 
                 total_size = sum(os.path.getsize(f) for f in generated_files) / 1024
                 print(f"📁 Total size: {total_size:.1f} KB")
-                print(f"📂 Location: {OUTPUT_DIR}/")
+                print(f"📂 Location: {self.output_dir}/")
             
             print("\n" + "🎉" + "="*58 + "🎉")
             print("                 GENERATION COMPLETED!")
@@ -766,6 +3335,233 @@ class UltimateBannerGenerator:
             import traceback
             traceback.print_exc()
 
+def _canonical_name(name):
+    """Normalize a package name the way PyPI does (PEP 503)"""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+_REQUIREMENT_NAME = re.compile(r"^\s*([A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)")
+
+def _requirement_name(requirement):
+    """Extract the distribution name from a PEP 508 requirement string"""
+    match = _REQUIREMENT_NAME.match(requirement)
+    return match.group(1) if match else None
+
+def _dedupe_entries(entries):
+    """Drop repeated packages, keeping the first occurrence"""
+    seen = set()
+    unique = []
+    for entry in entries:
+        key = (_canonical_name(entry['package']), tuple(entry.get('themes') or ()))
+        if key not in seen:
+            seen.add(key)
+            unique.append(entry)
+    return unique
+
+def _open_input(path):
+    """Open a text input file, treating '-' as stdin (which is left open)"""
+    if path == '-':
+        return contextlib.nullcontext(sys.stdin)
+    return open(path, 'r', encoding='utf-8')
+
+def read_packages_file(path):
+    """Read package names, one per line ('#' starts a comment)"""
+    names = []
+    with _open_input(path) as fh:
+        for line in fh:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                names.append(line)
+    return names
+
+def read_requirements(path):
+    """Read dependency names from a requirements.txt or pyproject.toml"""
+    if path.endswith('.toml'):
+        return _read_pyproject_dependencies(path)
+    
+    names = []
+    with _open_input(path) as fh:
+        for line in fh:
+            line = line.split(' #', 1)[0].strip()
+            # Skip blanks, comments, pip options (-r, -e, --index-url, ...) and paths/URLs
+            if not line or line.startswith(('#', '-', '.', '/')) or '://' in line.split('@')[0]:
+                continue
+            name = _requirement_name(line)
+            if name:
+                names.append(name)
+    return names
+
+def _read_pyproject_dependencies(path):
+    """Collect PEP 621 and Poetry dependency names from a pyproject.toml"""
+    if tomllib is None:
+        raise RuntimeError("Reading pyproject.toml needs Python 3.11+ or the 'tomli' package")
+    
+    with open(path, 'rb') as fh:
+        data = tomllib.load(fh)
+    
+    requirements = []
+    project = data.get('project', {})
+    requirements.extend(project.get('dependencies', []))
+    for extra in project.get('optional-dependencies', {}).values():
+        requirements.extend(extra)
+    
+    names = [_requirement_name(req) for req in requirements]
+    
+    poetry = data.get('tool', {}).get('poetry', {})
+    tables = [poetry.get('dependencies', {}), poetry.get('dev-dependencies', {})]
+    tables.extend(group.get('dependencies', {}) for group in poetry.get('group', {}).values())
+    for table in tables:
+        names.extend(name for name in table if name.lower() != 'python')
+    
+    return [name for name in names if name]
+
+def read_jsonl_entries(stream):
+    """Read batch entries from JSON lines
+    
+    Each line is either a JSON string (the package name) or an object with
+    a ``package`` (or ``name``) key and an optional ``theme``/``themes``.
+    """
+    entries = []
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {line_number}: invalid JSON ({e})")
+        
+        if isinstance(record, str):
+            record = {'package': record}
+        if not isinstance(record, dict) or not (record.get('package') or record.get('name')):
+            raise ValueError(f"line {line_number}: missing 'package'")
+        package = record.get('package') or record.get('name')
+        
+        themes = record.get('themes') or record.get('theme')
+        if isinstance(themes, (str, int)):
+            themes = [themes]
+        themes = [str(key) for key in themes] if themes else None
+        for key in themes or ():
+            if key not in ALL_THEMES:
+                raise ValueError(f"line {line_number}: unknown theme '{key}'")
+        
+        entries.append({'package': package, 'themes': themes})
+    return entries
+
+def read_batch_entries(packages_files=(), requirements_files=(), jsonl_stream=None):
+    """Combine every batch input into one de-duplicated list of entries"""
+    stdin_inputs = list(packages_files).count('-') + list(requirements_files).count('-')
+    if stdin_inputs + (jsonl_stream is not None) > 1:
+        raise ValueError("only one batch input can read from stdin ('-' or --jsonl)")
+    
+    entries = []
+    for path in packages_files:
+        entries.extend({'package': name, 'themes': None} for name in read_packages_file(path))
+    for path in requirements_files:
+        entries.extend({'package': name, 'themes': None} for name in read_requirements(path))
+    if jsonl_stream is not None:
+        entries.extend(read_jsonl_entries(jsonl_stream))
+    return _dedupe_entries(entries)
+
+# Per-process generator used by the theme render pool
+_worker_generator = None
+
+def _describe_result(result):
+    """One-line summary of a successful RenderResult"""
+    name = os.path.basename(result.path)
+    others = [os.path.basename(path) for path in result.paths[1:]]
+    also = f" + {', '.join(others)}" if others else ""
+    if result.cached:
+        size = os.path.getsize(result.path) / 1024
+        return f"♻️  Unchanged: {name} ({size:.1f} KB){also}"
+    encoded = result.encoded
+    return f"✅ Saved: {name} ({encoded.size / 1024:.1f} KB, encoded in {encoded.seconds * 1000:.0f} ms){also}"
+
+def _init_render_worker(generator):
+    """Install the parent's generator in a pool worker"""
+    global _worker_generator
+    _worker_generator = generator
+
+def _render_worker(package_data, themes, keys, layouts=None):
+    """Render and save themes of one package inside a pool worker"""
+    return _worker_generator._render_themes(package_data, themes, keys, layouts)
+
+class _PooledOutcome:
+    """Future-like view of one theme's outcome in a grouped pool task"""
+    
+    def __init__(self, future, position):
+        self.future = future
+        self.position = position
+    
+    def result(self):
+        encoded, error = self.future.result()[self.position]
+        if error is not None:
+            raise error
+        return encoded
+    
+    def cancel(self):
+        return self.future.cancel()
+
+class _EncodeGroup:
+    """Future-like view of the encodes of every scale of one banner"""
+    
+    def __init__(self, futures):
+        self.futures = futures
+    
+    def result(self):
+        return [future.result() for future in self.futures]
+    
+    def cancel(self):
+        return all([future.cancel() for future in self.futures])
+
+def _scale_list(value):
+    """argparse type for a comma-separated list of positive scales"""
+    scales = []
+    for part in value.split(','):
+        try:
+            scale = float(part)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"'{part}' is not a number")
+        if not 0 < scale <= 4:
+            raise argparse.ArgumentTypeError("scales must be greater than 0 and at most 4")
+        scale = int(scale) if scale == int(scale) else scale
+        if scale not in scales:
+            scales.append(scale)
+    return tuple(scales)
+
+def _template_list(value):
+    """argparse type for a comma-separated list of layout templates, or 'all'"""
+    if value == 'all':
+        return tuple(LAYOUT_TEMPLATES)
+    templates = []
+    for name in value.split(','):
+        if name not in LAYOUT_TEMPLATES:
+            raise argparse.ArgumentTypeError(
+                f"unknown template '{name}' (choose from {', '.join(LAYOUT_TEMPLATES)}, or all)")
+        if name not in templates:
+            templates.append(name)
+    return tuple(templates)
+
+def _badge_list(value):
+    """argparse type for a comma-separated list of badge types"""
+    badges = []
+    for name in value.split(','):
+        if name not in BADGE_TYPES:
+            raise argparse.ArgumentTypeError(
+                f"unknown badge '{name}' (choose from {', '.join(BADGE_TYPES)})")
+        if name not in badges:
+            badges.append(name)
+    return tuple(badges)
+
+def _positive_int(value):
+    """argparse type for options that need an integer >= 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not an integer")
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
 def main():
     """Main entry point with command-line interface"""
     parser = argparse.ArgumentParser(
@@ -775,6 +3571,9 @@ def main():
 Examples:
   python banner_generator.py                    # Interactive mode
   python banner_generator.py --package requests # Quick generation for 'requests'
+  python banner_generator.py -r requirements.txt --theme 2  # Banners for every dependency
+  python banner_generator.py --packages-file packages.txt   # One package name per line
+  cat packages.jsonl | python banner_generator.py --jsonl  # {"package": "numpy", "theme": "4"}
   python banner_generator.py --help            # Show this help message
 
 Interactive mode allows you to:
@@ -794,8 +3593,15 @@ Interactive mode allows you to:
     parser.add_argument(
         '--theme', '-t',
         type=str,
-        choices=['1', '2', '3', '4', '5', '6', '7', '8', '9', '10', '11', '12'],
-        help='Theme number (1-12). If not provided, interactive mode will show all options'
+        help='Theme key (1-12, or one from --theme-file). If not provided, interactive mode will show all options'
+    )
+    
+    parser.add_argument(
+        '--theme-file',
+        action='append',
+        default=[],
+        metavar='FILE',
+        help='Load extra themes from a TOML or JSON file (can be repeated)'
     )
     
     parser.add_argument(
@@ -811,6 +3617,154 @@ Interactive mode allows you to:
         help=f'Output directory (default: {OUTPUT_DIR})'
     )
     
+    parser.add_argument(
+        '--packages-file',
+        action='append',
+        default=[],
+        metavar='FILE',
+        help="Batch mode: file with one package name per line ('-' for stdin)"
+    )
+    
+    parser.add_argument(
+        '--requirements', '-r',
+        action='append',
+        default=[],
+        metavar='FILE',
+        help='Batch mode: generate banners for every dependency in a requirements.txt or pyproject.toml'
+    )
+    
+    parser.add_argument(
+        '--jsonl',
+        action='store_true',
+        help='Batch mode: read JSON lines from stdin ({"package": "name", "theme": "1"})'
+    )
+    
+    parser.add_argument(
+        '--index-url',
+        default=PYPI_BASE_URL,
+        metavar='URL',
+        help=f'Base URL of the PyPI JSON API (default: {PYPI_BASE_URL}, or $PYPI_BASE_URL)'
+    )
+    
+    parser.add_argument(
+        '--fetch-workers',
+        type=_positive_int,
+        default=8,
+        metavar='N',
+        help='Number of concurrent PyPI lookups in batch mode (default: 8)'
+    )
+    
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        default=10,
+        metavar='SECONDS',
+        help='Timeout for each PyPI request (default: 10)'
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        default=CACHE_DIR,
+        metavar='DIR',
+        help=f'Directory for the PyPI metadata cache (default: {CACHE_DIR})'
+    )
+    
+    parser.add_argument(
+        '--cache-ttl',
+        type=float,
+        default=METADATA_CACHE_TTL,
+        metavar='SECONDS',
+        help=f'Serve cached metadata without revalidation for this long (default: {METADATA_CACHE_TTL})'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always fetch package metadata from PyPI'
+    )
+    
+    parser.add_argument(
+        '--hash-names',
+        action='store_true',
+        help='Name files after their content hash instead of a timestamp'
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Re-render banners even if an identical render already exists'
+    )
+    
+    parser.add_argument(
+        '--no-render-cache',
+        action='store_true',
+        help=f'Do not read or update the render index ({RENDER_INDEX_NAME}) in the output directory'
+    )
+    
+    parser.add_argument(
+        '--format', '-f',
+        choices=sorted(ENCODER_PRESETS),
+        default='png',
+        help='Output format, svg for vector banners (default: png)'
+    )
+    
+    parser.add_argument(
+        '--encoder-preset',
+        choices=['fast', 'balanced', 'smallest'],
+        default=DEFAULT_ENCODER_PRESET,
+        help=f'Speed/size trade-off for the encoder (default: {DEFAULT_ENCODER_PRESET})'
+    )
+    
+    parser.add_argument(
+        '--encode-threads',
+        type=int,
+        default=2,
+        metavar='N',
+        help='Background encoder threads for single-process rendering, 0 to encode inline (default: 2)'
+    )
+    
+    parser.add_argument(
+        '--scales',
+        type=_scale_list,
+        default=(1,),
+        metavar='LIST',
+        help='Comma-separated output scales, e.g. 1,2,0.25 for 1x, retina and thumbnails; '
+             'rendered once at the largest and downsampled (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--templates',
+        type=_template_list,
+        default=(DEFAULT_TEMPLATE,),
+        metavar='LIST',
+        help='Comma-separated layout templates, or all: '
+             + ', '.join(f"{t.name} {t.canvas.width}x{t.canvas.height}" for t in LAYOUT_TEMPLATES.values())
+             + f' (default: {DEFAULT_TEMPLATE})'
+    )
+    
+    parser.add_argument(
+        '--badges',
+        type=_badge_list,
+        default=DEFAULT_BADGES,
+        metavar='LIST',
+        help=f"Comma-separated badges to show, from {', '.join(BADGE_TYPES)} "
+             f"(default: {','.join(DEFAULT_BADGES)})"
+    )
+    
+    parser.add_argument(
+        '--palette',
+        action='store_true',
+        help=f"Render {', '.join(PALETTE_THEME_TYPES)} themes as palette images: "
+             f"one render per layout, much faster to encode and smaller"
+    )
+    
+    parser.add_argument(
+        '--jobs', '-j',
+        type=_positive_int,
+        default=None,
+        help='Number of worker processes for multi-theme generation (default: CPU count)'
+    )
+    
     parser.add_argument(
         '--version', '-v',
         action='version',
@@ -819,43 +3773,75 @@ Interactive mode allows you to:
     
     args = parser.parse_args()
     
+    # Extra themes from installed plugins and theme files
+    for name, error in ALL_THEMES.load_entry_points():
+        print(f"⚠️  Skipping themes from plugin '{name}': {error}")
+    for path in args.theme_file:
+        try:
+            ALL_THEMES.load_file(path)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"❌ Could not load themes from {path}: {e}")
+            sys.exit(1)
+    if args.theme is not None and args.theme not in ALL_THEMES:
+        parser.error(f"unknown theme '{args.theme}' (choose from {', '.join(ALL_THEMES)})")
+    
     # List themes and exit
     if args.list_themes:
         print("🎨 Available Themes:")
         print("=" * 50)
         
-        categories = {
-            'Professional': ['1', '2', '5', '7'],
-            'Minimal': ['3', '4', '6'],
-            'Gradient': ['8', '10', '12'],
-            'Modern': ['9', '11']
-        }
-        
-        for category, theme_keys in categories.items():
-            print(f"\n📂 {category}:")
+        for label, _, theme_keys in ALL_THEMES.categories():
+            print(f"\n📂 {label}:")
             for key in theme_keys:
                 theme = ALL_THEMES[key]
-                print(f"   {key}. {theme['name'].replace('_', ' ').title()}")
-                print(f"      {theme['description']}")
+                print(f"   {key}. {theme.title}")
+                if theme.get('description'):
+                    print(f"      {theme['description']}")
         
-        print(f"\nUsage: python {sys.argv[0]} --package <package_name> --theme <1-12>")
+        print(f"\nUsage: python {sys.argv[0]} --package <package_name> --theme <{ALL_THEMES.describe_keys()}>")
         return
     
-    # Update output directory if specified
-    if args.output != OUTPUT_DIR:
-        # We'll pass this to the generator instead of using global
-        output_dir = args.output
-    else:
-        output_dir = OUTPUT_DIR
-    
     # Create generator instance
-    generator = UltimateBannerGenerator()
+    cache = None
+    if not args.no_cache:
+        cache = MetadataCache(os.path.join(args.cache_dir, "metadata.sqlite3"), ttl=args.cache_ttl)
+    client = PyPIClient(args.index_url, timeout=args.timeout,
+                        max_workers=args.fetch_workers, cache=cache)
+    generator = UltimateBannerGenerator(jobs=args.jobs, client=client, output_dir=args.output,
+                                        render_cache=not args.no_render_cache,
+                                        hash_names=args.hash_names, force=args.force,
+                                        encoder=BannerEncoder(args.format, args.encoder_preset,
+                                                              args.encode_threads),
+                                        scales=args.scales, templates=args.templates,
+                                        badges=args.badges, palette=args.palette)
+    
+    # Batch mode: many packages, one process
+    if args.packages_file or args.requirements or args.jsonl:
+        try:
+            entries = read_batch_entries(args.packages_file, args.requirements,
+                                         sys.stdin if args.jsonl else None)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"❌ Could not read batch input: {e}")
+            sys.exit(1)
+        if args.package:
+            entries = _dedupe_entries([{'package': args.package, 'themes': None}] + entries)
+        if not entries:
+            print("❌ No packages found in the batch input.")
+            sys.exit(1)
+        
+        default_themes = [args.theme or '1']
+        print("🚀 Batch Generation Mode")
+        print(f"🎨 Default theme: {ALL_THEMES[default_themes[0]].title}")
+        _, failed = generator.generate_batch(entries, default_themes)
+        if failed:
+            sys.exit(1)
+        return
     
     # If both package and theme provided, do quick generation
     if args.package and args.theme:
         print(f"🚀 Quick Generation Mode")
         print(f"📦 Package: {args.package}")
-        print(f"🎨 Theme: {ALL_THEMES[args.theme]['name'].replace('_', ' ').title()}")
+        print(f"🎨 Theme: {ALL_THEMES[args.theme].title}")
         
         # Fetch package data
         print("📡 Fetching package data from PyPI...")
@@ -866,11 +3852,14 @@ Interactive mode allows you to:
         
         # Generate banner
         theme = ALL_THEMES[args.theme]
-        img = generator.generate_banner(package_data, theme)
-        output_path = generator.save_banner(img, args.package, theme)
+        generator.print_fit_report(package_data)
+        result = generator.render_to_file(package_data, theme)
+        if result.error is not None:
+            print(f"❌ Failed to generate banner: {result.error}")
+            sys.exit(1)
         
-        file_size = os.path.getsize(output_path) / 1024
-        print(f"✅ Banner generated: {output_path} ({file_size:.1f} KB)")
+        print(f"📁 {result.path}")
+        print(f"   {_describe_result(result)}")
         return
     
     # If only package provided, interactive theme selection
@@ -878,10 +3867,7 @@ Interactive mode allows you to:
         print(f"📦 Package: {args.package}")
         print("🎨 Interactive theme selection...")
         
-        # Override the get_package_name method result
-        generator._package_name = args.package
-        
-        # Validate package exists
+        # Validate package exists (the same lookup feeds generation)
         print(f"🔍 Checking '{args.package}' on PyPI...")
         package_data = generator.fetch_package_data(args.package)
         if not package_data:
@@ -897,11 +3883,14 @@ Interactive mode allows you to:
         # Generate banners
         if len(selected_themes) == 1:
             theme = ALL_THEMES[selected_themes[0]]
-            img = generator.generate_banner(package_data, theme)
-            output_path = generator.save_banner(img, args.package, theme)
+            generator.print_fit_report(package_data)
+            result = generator.render_to_file(package_data, theme)
+            if result.error is not None:
+                print(f"❌ Failed to generate banner: {result.error}")
+                sys.exit(1)
             
-            file_size = os.path.getsize(output_path) / 1024
-            print(f"✅ Banner generated: {output_path} ({file_size:.1f} KB)")
+            print(f"📁 {result.path}")
+            print(f"   {_describe_result(result)}")
         else:
             generated_files = generator.generate_multiple_banners(package_data, selected_themes)
             total_size = sum(os.path.getsize(f) for f in generated_files) / 1024
@@ -914,5 +3903,3 @@ Interactive mode allows you to:
 
 if __name__ == "__main__":
     main()
-if __name__ == "__main__":
-    main()